@@ -2,26 +2,329 @@
 """
 한국어 음성 데이터를 HuggingFace에 배치 단위로 업로드
 간단한 흐름: 읽기 → 처리 → 푸시 → 삭제 → 반복
+ZIP은 압축 해제 없이 멤버를 바로 읽어 Parquet 샤드로 기록 (임시 wav/json 파일 없음)
+배치 N을 업로드하는 동안 배치 N+1을 미리 생성 (큐 깊이/디스크 예산으로 제한)
+배치마다 새 샤드 파일만 커밋하고 (append-only), README는 마지막에 한 번만 갱신
+매니페스트는 ZIP 쌍 단위로 기록해 --batch-size를 바꿔도 커밋된 쌍은 건너뜀, --verify로 원격 저장소와 대조
+배치 안의 ZIP 쌍은 프로세스 풀에서 쌍마다 병렬로 샤드 생성 (쌍 순서대로 병합)
 """
 
 import os
 import json
+import hashlib
 import zipfile
 import tempfile
 import shutil
 from pathlib import Path
-from typing import List, Dict, Tuple
-import pandas as pd
-from datasets import Dataset, DatasetDict, Audio, Features, Value, concatenate_datasets
-from huggingface_hub import HfApi, create_repo
+from typing import List, Dict, Tuple, Iterator
+import pyarrow as pa
+import pyarrow.parquet as pq
+from datasets import Audio, Features, Value
+from huggingface_hub import HfApi, CommitOperationAdd, CommitOperationDelete
 import argparse
 from tqdm import tqdm
 import gc
+import time
+import queue
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+DEFAULT_QUEUE_DEPTH = 1   # 업로드 대기 중인 생성 완료 배치 최대 수 (0: 순차 처리)
+DEFAULT_DISK_BUDGET_GB = 50   # 생성해 둔(업로드 전) 샤드 합계 상한
+MAX_SHARD_BYTES = 500 * 1024 * 1024   # Parquet 샤드 1개 최대 크기 (넘으면 다음 샤드로)
+ROW_GROUP_BYTES = 64 * 1024 * 1024   # 메모리에 모았다가 한 번에 기록하는 음성 바이트
+DEFAULT_MANIFEST = "upload_manifest.json"   # 커밋 완료된 ZIP 쌍/샤드 해시 기록
+DEFAULT_INGEST_WORKERS = os.cpu_count() or 1   # ZIP 쌍 병렬 처리 프로세스 수 (1: 현재 프로세스에서 순차 처리)
+
+def build_record(data: Dict, audio: Dict) -> Dict:
+    """라벨 JSON과 오디오({'bytes', 'path'})로 레코드 1개 생성"""
+    record = {
+        'audio': audio,
+        'dialog_id': data.get('DialogID', ''),
+        'category': data.get('Category', ''),
+        'subcategory': data.get('SubCategory', ''),
+        'text': '',
+        'gender': '',
+        'age': '',
+        'dialect': '',
+        'word_type': '',
+        'word_define': ''
+    }
+    
+    # 화자 정보
+    speakers = data.get('Speakers', [])
+    if speakers:
+        speaker = speakers[0]
+        record['gender'] = speaker.get('Gender', '')
+        record['age'] = speaker.get('AgeGroup', '')
+        record['dialect'] = speaker.get('Locate', '')
+    
+    # 대화 정보
+    dialogs = data.get('Dialogs', [])
+    if dialogs:
+        dialog = dialogs[0]
+        record['text'] = dialog.get('SpeakerText', '')
+        
+        words = dialog.get('WordInfo', [])
+        if words:
+            word_info = words[0]
+            record['word_type'] = word_info.get('WordType', '')
+            record['word_define'] = word_info.get('WordDefine', '')
+    
+    return record
+
+def read_zip_pair(source_zip: str, label_zip: str) -> Iterator[Dict]:
+    """원천/라벨 ZIP을 풀지 않고 멤버 이름으로 짝지어 레코드를 하나씩 yield
+    
+    JSON은 메모리에서 파싱, WAV는 해당 레코드를 만들 때만 읽음 (디스크 임시 파일 없음)
+    """
+    with zipfile.ZipFile(source_zip, 'r') as source_ref, zipfile.ZipFile(label_zip, 'r') as label_ref:
+        # 오디오 멤버 맵핑: 파일 ID → 멤버 이름
+        audio_members = {}
+        for member in source_ref.namelist():
+            if member.endswith('.wav'):
+                file_id = os.path.basename(member).replace('.wav', '')
+                audio_members[file_id] = member
+        
+        # JSON과 매칭하여 데이터 생성
+        for member in label_ref.namelist():
+            if not member.endswith('.json'):
+                continue
+            
+            file = os.path.basename(member)
+            file_id = file.replace('.json', '')
+            if file_id not in audio_members:
+                continue
+            
+            try:
+                data = json.loads(label_ref.read(member))
+                audio_member = audio_members[file_id]
+                audio = {'bytes': source_ref.read(audio_member), 'path': os.path.basename(audio_member)}
+            except Exception as e:
+                print(f"    JSON 오류 ({file}): {e}")
+                continue
+            
+            yield build_record(data, audio)
+
+def dir_size(path: str) -> int:
+    """디렉토리 아래 파일 크기 합계 (바이트)"""
+    total = 0
+    for root, _, files in os.walk(path):
+        for file in files:
+            total += os.path.getsize(os.path.join(root, file))
+    return total
+
+def estimate_batch_bytes(batch_pairs: List[Tuple[str, str]]) -> int:
+    """배치 샤드 크기 추정 (wav는 거의 압축되지 않으므로 ZIP 크기 합계로 근사)"""
+    return sum(os.path.getsize(source_zip) + os.path.getsize(label_zip) for source_zip, label_zip in batch_pairs)
+
+def pair_key(split_name: str, pair: Tuple[str, str]) -> str:
+    """ZIP 쌍 식별 해시 (split + 원천/라벨 ZIP 이름) - 배치 구성과 무관하게 매니페스트 키/샤드 파일명에 사용"""
+    names = [split_name] + [os.path.basename(path) for path in pair]
+    return hashlib.sha256("\n".join(names).encode('utf-8')).hexdigest()
+
+def shard_prefix(split_name: str, key: str, content_hash: str) -> str:
+    """ZIP 쌍의 샤드 파일명 접두사 (쌍 키 + 내용 해시) - 매니페스트 없이도 원격 샤드를 찾을 수 있음"""
+    return f"{split_name}-{key[:16]}-{content_hash[:8]}"
+
+def zip_content_hash(pair: Tuple[str, str]) -> str:
+    """ZIP 쌍 내용 해시 (중앙 디렉터리의 멤버 이름/CRC/크기만 읽으므로 빠름)"""
+    sha = hashlib.sha256()
+    for path in pair:
+        with zipfile.ZipFile(path, 'r') as zip_ref:
+            for info in zip_ref.infolist():
+                sha.update(f"{info.filename}\0{info.CRC}\0{info.file_size}\n".encode('utf-8'))
+    return sha.hexdigest()
+
+def file_sha256(path: str) -> str:
+    sha = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            sha.update(block)
+    return sha.hexdigest()
+
+def write_parquet_shards(records: Iterator[Dict], schema: pa.Schema, staging_dir: str, prefix: str) -> List[Dict]:
+    """레코드를 MAX_SHARD_BYTES 단위 Parquet 샤드들로 기록
+    
+    반환: [{'local_path', 'name', 'rows'}, ...]
+    """
+    shards = []
+    writer = None
+    shard_bytes = 0
+    buffer, buffer_bytes = [], 0
+    
+    def flush():
+        nonlocal writer, shard_bytes, buffer, buffer_bytes
+        if not buffer:
+            return
+        if writer is None:
+            name = f"{prefix}-{len(shards):03d}.parquet"
+            local_path = os.path.join(staging_dir, name)
+            writer = pq.ParquetWriter(local_path, schema)
+            shards.append({'local_path': local_path, 'name': name, 'rows': 0})
+            shard_bytes = 0
+        writer.write_table(pa.Table.from_pylist(buffer, schema=schema))
+        shards[-1]['rows'] += len(buffer)
+        shard_bytes += buffer_bytes
+        buffer, buffer_bytes = [], 0
+        if shard_bytes >= MAX_SHARD_BYTES:
+            writer.close()
+            writer = None
+    
+    try:
+        for record in records:
+            buffer.append(record)
+            buffer_bytes += len(record['audio']['bytes'])
+            if buffer_bytes >= ROW_GROUP_BYTES:
+                flush()
+        flush()
+    finally:
+        if writer is not None:
+            writer.close()
+    return shards
+
+def build_pair_shards(pair_index: int, source_zip: str, label_zip: str, schema: pa.Schema, staging_dir: str, prefix: str) -> List[Dict]:
+    """ZIP 쌍 1개 → Parquet 샤드 (프로세스 풀 작업 단위)
+    
+    ZIP inflate/JSON 파싱/샤드 기록/해시까지 워커에서 끝내고 샤드 정보만 반환 (음성 바이트는 IPC로 넘기지 않음)
+    """
+    print(f"  파일 {pair_index + 1}: {os.path.basename(source_zip)}")
+    shards = write_parquet_shards(read_zip_pair(source_zip, label_zip), schema, staging_dir, prefix)
+    for shard in shards:
+        shard['sha256'] = file_sha256(shard['local_path'])
+    return shards
+
+class UploadManifest:
+    """ZIP 쌍별 진행 상태를 기록하는 로컬 매니페스트 (재시작 시 커밋된 쌍 건너뛰기)
+    
+    쌍 항목: split, source/label(ZIP 이름), content_hash, samples,
+            shards([{path_in_repo, sha256, rows}]), status('built' → 'committed')
+    배치는 업로드 묶음일 뿐이라 --batch-size를 바꿔도 키와 샤드 이름은 그대로
+    replaced: ZIP 내용이 바뀌어 다시 만든 쌍의 이전 샤드 경로 (finalize에서 원격 삭제)
+    """
+    
+    def __init__(self, path: str, repo_id: str):
+        self.path = Path(path)
+        self.lock = threading.Lock()   # 생성 스레드와 업로드 스레드가 함께 기록
+        self.data = {'repo_id': repo_id, 'pairs': {}}
+        if self.path.exists():
+            with open(self.path, 'r', encoding='utf-8') as f:
+                self.data = json.load(f)
+            if self.data.get('repo_id') != repo_id:
+                raise ValueError(f"매니페스트 저장소가 다릅니다: {self.data.get('repo_id')} != {repo_id} ({self.path})")
+            if 'pairs' not in self.data:
+                # 배치 단위 키를 쓰던 이전 형식: 쌍 단위로 다시 올림 (이전 샤드는 --verify --prune으로 정리)
+                print(f"⚠️ 이전 형식 매니페스트 ({self.path}) - ZIP 쌍 단위로 새로 기록, 이전 샤드는 --verify --prune으로 삭제")
+                self.data = {'repo_id': repo_id, 'pairs': {}}
+    
+    @property
+    def pairs(self) -> Dict[str, Dict]:
+        return self.data['pairs']
+    
+    def get(self, key: str) -> Dict:
+        return self.pairs.get(key)
+    
+    def is_committed(self, key: str, content_hash: str) -> bool:
+        """커밋 완료 + 원본 ZIP 내용이 그대로인지"""
+        entry = self.pairs.get(key)
+        return bool(entry) and entry['status'] == 'committed' and entry['content_hash'] == content_hash
+    
+    def record_built(self, key: str, split_name: str, pair: Tuple[str, str], content_hash: str, shards: List[Dict], status: str = 'built'):
+        with self.lock:
+            previous = self.pairs.get(key)
+            if previous:
+                new_paths = {shard['path_in_repo'] for shard in shards}
+                self.data.setdefault('replaced', []).extend(
+                    shard['path_in_repo'] for shard in previous['shards'] if shard['path_in_repo'] not in new_paths
+                )
+            self.pairs[key] = {
+                'split': split_name,
+                'source': os.path.basename(pair[0]),
+                'label': os.path.basename(pair[1]),
+                'content_hash': content_hash,
+                'samples': sum(shard['rows'] or 0 for shard in shards),
+                'shards': shards,
+                'status': status,
+                'updated_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            }
+            self.save()
+    
+    def set_status(self, keys: List[str], status: str):
+        with self.lock:
+            for key in keys:
+                self.pairs[key]['status'] = status
+                self.pairs[key]['updated_at'] = time.strftime('%Y-%m-%dT%H:%M:%S')
+            self.save()
+    
+    def committed_paths(self) -> set:
+        """커밋 완료된 쌍의 원격 샤드 경로"""
+        return {
+            shard['path_in_repo']
+            for entry in self.pairs.values() if entry['status'] == 'committed'
+            for shard in entry['shards']
+        }
+    
+    def replaced_paths(self) -> List[str]:
+        """이 매니페스트가 기록했다가 교체한 샤드 중 지금 커밋된 샤드가 아닌 것"""
+        committed = self.committed_paths()
+        return sorted(set(self.data.get('replaced', [])) - committed)
+    
+    def clear_replaced(self, paths: List[str]):
+        with self.lock:
+            done = set(paths)
+            self.data['replaced'] = [path for path in self.data.get('replaced', []) if path not in done]
+            self.save()
+    
+    def splits(self) -> List[str]:
+        return sorted({entry['split'] for entry in self.pairs.values() if entry['status'] == 'committed'})
+    
+    def save(self):
+        """임시 파일에 쓴 뒤 교체 (쓰는 도중 중단돼도 이전 매니페스트 유지)"""
+        tmp_path = self.path.with_suffix(".tmp")
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.data, f, ensure_ascii=False, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+
+class DiskBudget:
+    """생성 단계가 업로드 전 샤드를 예산 이상 쌓지 않도록 막는 가드 (backpressure)"""
+    
+    def __init__(self, budget_bytes: int):
+        self.budget_bytes = budget_bytes
+        self.used = 0
+        self.cond = threading.Condition()
+    
+    def acquire(self, nbytes: int, stop: threading.Event):
+        """예산이 날 때까지 대기 후 예약 (쌓인 게 없으면 예산보다 커도 1개는 허용)"""
+        with self.cond:
+            while self.used > 0 and self.used + nbytes > self.budget_bytes and not stop.is_set():
+                self.cond.wait(timeout=1)
+            self.used += nbytes
+    
+    def adjust(self, reserved: int, actual: int):
+        with self.cond:
+            self.used += actual - reserved
+            self.cond.notify_all()
+    
+    def release(self, nbytes: int):
+        with self.cond:
+            self.used -= nbytes
+            self.cond.notify_all()
+
+def print_disk_free(path: str = "/"):
+    """남은 디스크 공간 출력"""
+    free = shutil.disk_usage(path).free
+    print(f"  💾 남은 디스크 공간: {free / 1024**3:.1f}G")
 
 class KoreanSpeechBatchUploader:
-    def __init__(self, repo_id: str, token: str = None):
+    def __init__(self, repo_id: str, token: str = None, manifest_path: str = DEFAULT_MANIFEST, ingest_workers: int = DEFAULT_INGEST_WORKERS, api: HfApi = None):
         self.repo_id = repo_id
-        self.api = HfApi(token=token)
+        self.api = api or HfApi(token=token)   # HfApi 호환 객체를 넘기면 로컬 허브 대역으로도 실행 가능
+        self.manifest = UploadManifest(manifest_path, repo_id)
+        self.ingest_workers = ingest_workers
+        self.pool = None
         
         # Features 정의
         self.features = Features({
@@ -39,173 +342,335 @@ class KoreanSpeechBatchUploader:
         
         # 저장소 생성
         try:
-            create_repo(self.repo_id, repo_type="dataset", private=True, exist_ok=True, token=self.api.token)
+            self.api.create_repo(self.repo_id, repo_type="dataset", private=True, exist_ok=True)
         except Exception as e:
             print(f"저장소 생성/확인: {e}")
-        
-        self.first_push = {'train': True, 'validation': True}
     
-    def process_batch(self, batch_pairs: List[Tuple[str, str]], split_name: str, batch_num: int, total_batches: int):
+    def build_batch(self, batch: List[Tuple[Tuple[str, str], str, str]], split_name: str, batch_num: int, total_batches: int):
         """
-        배치 처리: ZIP 읽기 → 처리 → 푸시 → 임시파일 삭제
+        배치 생성: ZIP 멤버 스트리밍 → Parquet 샤드 기록
+        batch: [(ZIP 쌍, 쌍 키, 쌍 내용 해시), ...]
+        반환: (shards, staging_dir) - 업로드 후 cleanup_batch(staging_dir)로 삭제
         """
-        print(f"\n📦 배치 [{batch_num}/{total_batches}] 처리 시작...")
+        print(f"\n📦 배치 [{batch_num}/{total_batches}] 생성 시작...")
         
-        # 1. 임시 디렉토리 생성
-        temp_dir = tempfile.mkdtemp(prefix=f"korean_speech_{split_name}_")
+        # 샤드 staging 디렉토리 (압축 해제 파일 없이 Parquet 샤드만 기록됨)
+        staging_dir = tempfile.mkdtemp(prefix=f"korean_speech_{split_name}_")
         
         try:
-            all_data = []
-            
-            # 2. 배치 내 모든 ZIP 파일 처리
-            for i, (source_zip, label_zip) in enumerate(batch_pairs, 1):
-                print(f"  파일 {i}/{len(batch_pairs)}: {os.path.basename(source_zip)}")
-                
-                # ZIP 파일 압축 해제
-                filename = os.path.basename(source_zip).replace('.zip', '')
-                for prefix in ['VS_', 'VL_', 'TS_', 'TL_']:
-                    filename = filename.replace(prefix, '')
-                
-                audio_dir = os.path.join(temp_dir, filename, 'audio')
-                label_dir = os.path.join(temp_dir, filename, 'label')
-                os.makedirs(audio_dir, exist_ok=True)
-                os.makedirs(label_dir, exist_ok=True)
-                
-                # 원천데이터(오디오) 압축 해제
-                with zipfile.ZipFile(source_zip, 'r') as zip_ref:
-                    for member in zip_ref.namelist():
-                        if member.endswith('.wav'):
-                            filename_only = os.path.basename(member)
-                            target_path = os.path.join(audio_dir, filename_only)
-                            source = zip_ref.open(member)
-                            with open(target_path, 'wb') as target:
-                                shutil.copyfileobj(source, target)
-                
-                # 라벨링데이터(JSON) 압축 해제
-                with zipfile.ZipFile(label_zip, 'r') as zip_ref:
-                    for member in zip_ref.namelist():
-                        if member.endswith('.json'):
-                            filename_only = os.path.basename(member)
-                            target_path = os.path.join(label_dir, filename_only)
-                            source = zip_ref.open(member)
-                            with open(target_path, 'wb') as target:
-                                shutil.copyfileobj(source, target)
-                
-                # 오디오 파일 맵핑
-                audio_files = {}
-                for file in os.listdir(audio_dir):
-                    if file.endswith('.wav'):
-                        file_id = file.replace('.wav', '')
-                        audio_files[file_id] = os.path.join(audio_dir, file)
-                
-                # JSON과 매칭하여 데이터 생성
-                for file in os.listdir(label_dir):
-                    if file.endswith('.json'):
-                        file_id = file.replace('.json', '')
-                        json_path = os.path.join(label_dir, file)
-                        
-                        try:
-                            with open(json_path, 'r', encoding='utf-8') as f:
-                                data = json.load(f)
-                            
-                            if file_id in audio_files:
-                                record = {
-                                    'audio': audio_files[file_id],
-                                    'dialog_id': data.get('DialogID', ''),
-                                    'category': data.get('Category', ''),
-                                    'subcategory': data.get('SubCategory', ''),
-                                    'text': '',
-                                    'gender': '',
-                                    'age': '',
-                                    'dialect': '',
-                                    'word_type': '',
-                                    'word_define': ''
-                                }
-                                
-                                # 화자 정보
-                                speakers = data.get('Speakers', [])
-                                if speakers:
-                                    speaker = speakers[0]
-                                    record['gender'] = speaker.get('Gender', '')
-                                    record['age'] = speaker.get('AgeGroup', '')
-                                    record['dialect'] = speaker.get('Locate', '')
-                                
-                                # 대화 정보
-                                dialogs = data.get('Dialogs', [])
-                                if dialogs:
-                                    dialog = dialogs[0]
-                                    record['text'] = dialog.get('SpeakerText', '')
-                                    
-                                    words = dialog.get('WordInfo', [])
-                                    if words:
-                                        word_info = words[0]
-                                        record['word_type'] = word_info.get('WordType', '')
-                                        record['word_define'] = word_info.get('WordDefine', '')
-                                
-                                all_data.append(record)
-                        
-                        except Exception as e:
-                            print(f"    JSON 오류 ({file}): {e}")
-            
-            # 3. Dataset 생성 및 푸시
-            if all_data:
-                print(f"  데이터셋 생성 중... ({len(all_data)}개 샘플)")
-                df = pd.DataFrame(all_data)
-                dataset = Dataset.from_pandas(df, features=self.features)
-                
-                print(f"  📤 HuggingFace에 푸시 중...")
-                dataset_dict = DatasetDict({split_name: dataset})
-                
-                # 첫 번째 푸시인지 확인
-                if self.first_push[split_name]:
-                    # 처음이면 새로 생성
-                    dataset_dict.push_to_hub(
-                        self.repo_id,
-                        token=self.api.token,
-                        private=True,
-                        commit_message=f"Add {split_name} batch {batch_num}"
-                    )
-                    self.first_push[split_name] = False
-                else:
-                    # 이후는 추가 (append는 자동으로 됨)
-                    dataset_dict.push_to_hub(
-                        self.repo_id,
-                        token=self.api.token,
-                        private=True,
-                        commit_message=f"Add {split_name} batch {batch_num}"
-                    )
-                
-                print(f"  ✅ 배치 {batch_num} 완료")
+            # ZIP 쌍마다 레코드를 바로 Arrow writer로 기록 (쌍별 병렬, 결과는 쌍 순서대로 병합)
+            # 파일명은 쌍 키 + 쌍 내용 해시: 배치 구성과 무관하고, ZIP이 바뀌면 새 이름 (이전 샤드는 finalize에서 삭제)
+            args = (
+                range(len(batch)),
+                [pair[0] for pair, _, _ in batch],
+                [pair[1] for pair, _, _ in batch],
+                [self.features.arrow_schema] * len(batch),   # datasets가 Audio로 인식하도록 features 메타데이터 포함
+                [staging_dir] * len(batch),
+                [shard_prefix(split_name, key, content_hash) for _, key, content_hash in batch],
+            )
+            if self.ingest_workers > 1 and len(batch) > 1:
+                pair_shards = list(self.get_pool().map(build_pair_shards, *args))
+            else:
+                pair_shards = list(map(build_pair_shards, *args))
+            shards = [shard for shards in pair_shards for shard in shards]
+        except BaseException:
+            self.cleanup_batch(staging_dir)
+            raise
+        
+        for (pair, key, content_hash), shards_of_pair in zip(batch, pair_shards):
+            self.manifest.record_built(key, split_name, pair, content_hash, [
+                {'path_in_repo': f"data/{shard['name']}", 'sha256': shard['sha256'], 'rows': shard['rows']}
+                for shard in shards_of_pair
+            ])
+        print(f"  배치 {batch_num} 샤드 생성 완료 ({sum(shard['rows'] for shard in shards)}개 샘플, 샤드 {len(shards)}개)")
+        return shards, staging_dir
+    
+    def get_pool(self) -> ProcessPoolExecutor:
+        """ZIP 쌍 처리용 프로세스 풀 (배치마다 새로 띄우지 않고 재사용)
+        
+        생성 스레드에서 fork하지 않도록 spawn 사용
+        """
+        if self.pool is None:
+            self.pool = ProcessPoolExecutor(
+                max_workers=self.ingest_workers,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+        return self.pool
+    
+    def close(self):
+        if self.pool is not None:
+            self.pool.shutdown(cancel_futures=True)
+            self.pool = None
+    
+    def push_batch(self, shards: List[Dict], split_name: str, batch_num: int, keys: List[str]):
+        """배치 샤드만 새 파일로 커밋 (기존 샤드/메타데이터는 건드리지 않음)"""
+        if shards:
+            print(f"  📤 배치 {batch_num} HuggingFace에 커밋 중... (샤드 {len(shards)}개)")
+            self.api.create_commit(
+                repo_id=self.repo_id,
+                repo_type="dataset",
+                operations=[
+                    CommitOperationAdd(path_in_repo=f"data/{shard['name']}", path_or_fileobj=shard['local_path'])
+                    for shard in shards
+                ],
+                commit_message=f"Add {split_name} batch {batch_num}"
+            )
+        
+        self.manifest.set_status(keys, 'committed')
+        print(f"  ✅ 배치 {batch_num} 완료")
+    
+    def remote_shard_hashes(self, paths: List[str]) -> Dict[str, str]:
+        """원격 저장소에 있는 파일의 {경로: sha256} (LFS 정보가 없으면 None)"""
+        found = {}
+        for i in range(0, len(paths), 100):
+            for info in self.api.get_paths_info(self.repo_id, paths[i:i + 100], repo_type="dataset"):
+                lfs = getattr(info, 'lfs', None)
+                found[info.path] = lfs.sha256 if lfs is not None else None
+        return found
+    
+    def shards_match(self, entry: Dict, remote: Dict[str, str]) -> bool:
+        """쌍의 모든 샤드가 원격에 있고 해시가 같은지"""
+        for shard in entry['shards']:
+            if shard['path_in_repo'] not in remote:
+                return False
+            sha = remote[shard['path_in_repo']]
+            if sha is not None and sha != shard['sha256']:
+                return False
+        return True
+    
+    def recover(self):
+        """생성 후 커밋 기록 전에 중단된 쌍: 원격에 샤드가 이미 있으면 커밋 완료로 표시"""
+        pending = {key: entry for key, entry in self.manifest.pairs.items() if entry['status'] == 'built'}
+        if not pending:
+            return
+        
+        paths = [shard['path_in_repo'] for entry in pending.values() for shard in entry['shards']]
+        remote = self.remote_shard_hashes(paths)
+        for key, entry in pending.items():
+            if entry['shards'] and self.shards_match(entry, remote):
+                self.manifest.set_status([key], 'committed')
+                print(f"♻️ {entry['split']} {entry['source']}: 원격에 샤드가 있어 커밋 완료로 복구")
+    
+    def adopt_remote(self, key: str, split_name: str, pair: Tuple[str, str], content_hash: str, remote_files: set) -> bool:
+        """매니페스트에 커밋 기록이 없는 쌍: 같은 키/내용 해시의 샤드가 원격에 있으면 다시 만들지 않고 커밋 완료로 기록
+        
+        배치는 한 커밋으로 올라가므로 접두사가 같은 샤드가 원격에 있으면 그 쌍의 샤드는 모두 커밋된 것
+        (매니페스트를 잃었거나 다른 폴더/머신에서 실행한 경우)
+        """
+        prefix = f"data/{shard_prefix(split_name, key, content_hash)}-"
+        paths = sorted(path for path in remote_files if path.startswith(prefix))
+        if not paths:
+            return False
+        remote = self.remote_shard_hashes(paths)
+        self.manifest.record_built(key, split_name, pair, content_hash, [
+            {'path_in_repo': path, 'sha256': remote.get(path), 'rows': None}
+            for path in paths
+        ], status='committed')
+        print(f"♻️ {split_name} {os.path.basename(pair[0])}: 원격에 샤드 {len(paths)}개가 있어 커밋 완료로 기록")
+        return True
+    
+    def remote_data_files(self) -> set:
+        return {path for path in self.api.list_repo_files(self.repo_id, repo_type="dataset") if path.startswith("data/")}
+    
+    def verify(self, prune: bool = False) -> bool:
+        """매니페스트와 원격 파일 목록/해시 대조 - 누락/불일치 쌍은 미완료로 되돌려 다음 실행에서 재업로드
+        
+        prune: 매니페스트 밖 원격 파일(배치 구성 변경/ZIP 변경 전의 샤드)을 삭제
+        """
+        remote_files = self.remote_data_files()
+        committed = {key: entry for key, entry in self.manifest.pairs.items() if entry['status'] == 'committed'}
+        paths = [shard['path_in_repo'] for entry in committed.values() for shard in entry['shards']]
+        remote = self.remote_shard_hashes([path for path in paths if path in remote_files])
+        
+        print(f"🔍 검증: 매니페스트 커밋 ZIP 쌍 {len(committed)}개, 원격 data/ 파일 {len(remote_files)}개")
+        bad = []
+        for key, entry in committed.items():
+            if not self.shards_match(entry, remote):
+                bad.append(key)
+                print(f"  ❌ {entry['split']} {entry['source']}: 샤드 누락/해시 불일치 → 다음 실행에서 재업로드")
+        if bad:
+            self.manifest.set_status(bad, 'built')
+        
+        orphans = sorted(remote_files - set(paths))
+        for path in orphans[:20]:
+            print(f"  ⚠️ 매니페스트에 없는 원격 파일: {path}")
+        if len(orphans) > 20:
+            print(f"  ... 외 {len(orphans) - 20}개")
+        if prune and orphans:
+            self.delete_remote_files(orphans)
+        
+        counted = [entry for key, entry in committed.items() if key not in bad]
+        samples = sum(entry['samples'] for entry in counted)
+        unknown = sum(any(shard['rows'] is None for shard in entry['shards']) for entry in counted)
+        print(f"{'✅' if not bad else '❌'} 정상 쌍 {len(committed) - len(bad)}개, 문제 쌍 {len(bad)}개, "
+              f"매니페스트 밖 파일 {len(orphans)}개{' (삭제함)' if prune and orphans else ''}, 커밋된 샘플 {samples:,}개"
+              + (f" (원격에서 가져와 행 수를 모르는 쌍 {unknown}개 제외)" if unknown else ""))
+        return not bad
+    
+    def delete_remote_files(self, paths: List[str]):
+        self.api.create_commit(
+            repo_id=self.repo_id,
+            repo_type="dataset",
+            operations=[CommitOperationDelete(path_in_repo=path) for path in paths],
+            commit_message=f"Remove {len(paths)} stale shards"
+        )
+        print(f"  🧹 원격 샤드 {len(paths)}개 삭제")
+    
+    def finalize(self):
+        """교체된 이전 샤드 삭제 + README(데이터셋 카드)의 split 설정을 마지막에 한 번만 갱신
+        
+        이 매니페스트가 기록했다가 ZIP 내용이 바뀌어 교체한 샤드만 삭제 (data/{split}-* 글롭에 함께 잡혀 샘플이 중복되지 않도록)
+        매니페스트에 없는 원격 파일은 지우지 않음 - 필요하면 --verify --prune
+        """
+        replaced = self.manifest.replaced_paths()
+        if replaced:
+            stale = sorted(set(replaced) & self.remote_data_files())
+            if stale:
+                self.delete_remote_files(stale)
+            self.manifest.clear_replaced(replaced)
         
+        splits = self.manifest.splits()
+        if not splits:
+            return
+        
+        data_files = "\n".join(
+            f"  - split: {split}\n    path: data/{split}-*" for split in splits
+        )
+        card = (
+            "---\n"
+            "configs:\n"
+            "- config_name: default\n"
+            f"  data_files:\n{data_files}\n"
+            "---\n\n"
+            f"# {self.repo_id}\n\n"
+            "AIHub 연령대별 특징적 발화(은어·속어 등) 음성 데이터\n"
+        )
+        self.api.create_commit(
+            repo_id=self.repo_id,
+            repo_type="dataset",
+            operations=[CommitOperationAdd(path_in_repo="README.md", path_or_fileobj=card.encode('utf-8'))],
+            commit_message="Update dataset card"
+        )
+        print(f"📝 데이터셋 카드 갱신: {', '.join(splits)}")
+    
+    def cleanup_batch(self, staging_dir: str):
+        """staging 샤드 삭제 및 메모리 정리"""
+        if os.path.exists(staging_dir):
+            shutil.rmtree(staging_dir)
+            print(f"  🧹 임시 파일 삭제 완료")
+        
+        # 메모리 정리
+        gc.collect()
+        
+        # 디스크 공간 확인
+        print_disk_free()
+    
+    def process_batch(self, batch: List[Tuple[Tuple[str, str], str, str]], split_name: str, batch_num: int, total_batches: int):
+        """
+        배치 처리 (순차): 생성 → 커밋 → staging 샤드 삭제
+        """
+        shards, staging_dir = self.build_batch(batch, split_name, batch_num, total_batches)
+        try:
+            self.push_batch(shards, split_name, batch_num, [key for _, key, _ in batch])
         finally:
-            # 4. 임시 디렉토리 삭제
-            if os.path.exists(temp_dir):
-                shutil.rmtree(temp_dir)
-                print(f"  🧹 임시 파일 삭제 완료")
-            
-            # 메모리 정리
-            gc.collect()
-            
-            # 디스크 공간 확인
-            import subprocess
-            result = subprocess.run(['df', '-h', '/'], capture_output=True, text=True)
-            lines = result.stdout.strip().split('\n')
-            if len(lines) > 1:
-                parts = lines[1].split()
-                if len(parts) > 3:
-                    print(f"  💾 남은 디스크 공간: {parts[3]}")
-    
-    def upload_split(self, zip_pairs: List[Tuple[str, str]], split_name: str, batch_size: int):
+            self.cleanup_batch(staging_dir)
+    
+    def upload_split(
+        self,
+        zip_pairs: List[Tuple[str, str]],
+        split_name: str,
+        batch_size: int,
+        queue_depth: int = DEFAULT_QUEUE_DEPTH,
+        disk_budget_gb: float = DEFAULT_DISK_BUDGET_GB
+    ):
         """
-        전체 split을 배치 단위로 처리
+        전체 split을 배치 단위로 처리 (커밋 안 된 ZIP 쌍만 batch_size개씩 묶음)
+        queue_depth > 0: 생성 스레드가 다음 배치를 미리 만들고, 메인 스레드는 업로드만 담당
         """
-        total_batches = (len(zip_pairs) + batch_size - 1) // batch_size
+        pending = []
+        remote_files = None
+        for pair in zip_pairs:
+            key = pair_key(split_name, pair)
+            content_hash = zip_content_hash(pair)
+            if self.manifest.is_committed(key, content_hash):
+                continue
+            if remote_files is None:
+                remote_files = self.remote_data_files()
+            if self.adopt_remote(key, split_name, pair, content_hash, remote_files):
+                continue
+            if self.manifest.get(key) and self.manifest.get(key)['content_hash'] != content_hash:
+                print(f"⚠️ {os.path.basename(pair[0])}: 원본 ZIP이 바뀌어 다시 업로드")
+            pending.append((pair, key, content_hash))
         
-        for batch_num, batch_start in enumerate(range(0, len(zip_pairs), batch_size), 1):
-            batch_end = min(batch_start + batch_size, len(zip_pairs))
-            batch_pairs = zip_pairs[batch_start:batch_end]
-            
-            self.process_batch(batch_pairs, split_name, batch_num, total_batches)
+        skipped = len(zip_pairs) - len(pending)
+        if skipped:
+            print(f"⏭️ 이미 커밋된 ZIP 쌍 {skipped}개 건너뜀 (남은 쌍 {len(pending)}개)")
+        
+        total_batches = (len(pending) + batch_size - 1) // batch_size
+        batches = [
+            (batch_num, pending[batch_start:batch_start + batch_size])
+            for batch_num, batch_start in enumerate(range(0, len(pending), batch_size), 1)
+        ]
+        
+        if queue_depth <= 0:
+            for batch_num, batch in batches:
+                self.process_batch(batch, split_name, batch_num, total_batches)
+            return
+        
+        budget = DiskBudget(int(disk_budget_gb * 1024**3))
+        ready = queue.Queue(maxsize=queue_depth)
+        stop = threading.Event()
+        
+        def producer():
+            try:
+                for batch_num, batch in batches:
+                    if stop.is_set():
+                        return
+                    reserved = estimate_batch_bytes([pair for pair, _, _ in batch])
+                    budget.acquire(reserved, stop)
+                    if stop.is_set():
+                        budget.release(reserved)
+                        return
+                    try:
+                        shards, staging_dir = self.build_batch(batch, split_name, batch_num, total_batches)
+                    except BaseException:
+                        budget.release(reserved)
+                        raise
+                    size = dir_size(staging_dir)
+                    budget.adjust(reserved, size)
+                    ready.put((batch_num, [key for _, key, _ in batch], shards, staging_dir, size))
+            except BaseException as e:
+                ready.put(e)
+                return
+            ready.put(None)
+        
+        thread = threading.Thread(target=producer, name=f"build-{split_name}", daemon=True)
+        thread.start()
+        
+        try:
+            while True:
+                item = ready.get()
+                if item is None:
+                    break
+                if isinstance(item, BaseException):
+                    raise item
+                batch_num, keys, shards, staging_dir, size = item
+                try:
+                    self.push_batch(shards, split_name, batch_num, keys)
+                finally:
+                    self.cleanup_batch(staging_dir)
+                    budget.release(size)
+        finally:
+            # 업로드 실패 시 생성 스레드를 멈추고 대기 중인 배치 캐시 정리
+            stop.set()
+            while thread.is_alive() or not ready.empty():
+                try:
+                    item = ready.get(timeout=1)
+                except queue.Empty:
+                    continue
+                if isinstance(item, tuple):
+                    self.cleanup_batch(item[3])
+            thread.join()
 
 def get_file_pairs(base_path: str, split: str) -> List[Tuple[str, str]]:
     """파일 쌍 목록 생성"""
@@ -236,47 +701,77 @@ def main():
     parser = argparse.ArgumentParser(description="한국어 음성 데이터 배치 업로드")
     parser.add_argument("--repo-id", required=True)
     parser.add_argument("--token", help="HuggingFace API token")
+    parser.add_argument("--endpoint", default=None, help="허브 주소 (로컬 허브로 테스트할 때)")
     parser.add_argument("--mode", choices=['test', 'validation', 'training', 'all'], default='test')
-    parser.add_argument("--batch-size", type=int, default=5, help="배치 크기")
+    parser.add_argument("--batch-size", type=int, default=5, help="배치 크기 (커밋 1번에 올리는 ZIP 쌍 수)")
+    parser.add_argument("--queue-depth", type=int, default=DEFAULT_QUEUE_DEPTH,
+                        help=f"업로드 대기 중 미리 생성해 둘 배치 수 (0: 순차 처리, 기본: {DEFAULT_QUEUE_DEPTH})")
+    parser.add_argument("--disk-budget-gb", type=float, default=DEFAULT_DISK_BUDGET_GB,
+                        help=f"업로드 전 샤드 합계 상한 GB (기본: {DEFAULT_DISK_BUDGET_GB})")
+    parser.add_argument("--manifest", default=DEFAULT_MANIFEST,
+                        help=f"커밋 완료 배치 기록 (재시작 시 건너뛰기, 기본: {DEFAULT_MANIFEST})")
+    parser.add_argument("--verify", action="store_true",
+                        help="업로드 없이 매니페스트를 원격 저장소 파일 목록/해시와 대조 (문제 쌍은 다음 실행에서 재업로드)")
+    parser.add_argument("--prune", action="store_true",
+                        help="--verify와 함께: 매니페스트에 없는 원격 data/ 파일 삭제")
+    parser.add_argument("--ingest-workers", type=int, default=DEFAULT_INGEST_WORKERS,
+                        help=f"배치 안의 ZIP 쌍을 병렬 처리할 프로세스 수 (1: 순차, 기본: {DEFAULT_INGEST_WORKERS})")
     
     args = parser.parse_args()
+    pipeline = {'queue_depth': args.queue_depth, 'disk_budget_gb': args.disk_budget_gb}
     
     base_path = "./132.연령대별 특징적 발화(은어·속어 등) 음성 데이터/01-1.정식개방데이터"
     
-    uploader = KoreanSpeechBatchUploader(args.repo_id, args.token)
+    uploader = KoreanSpeechBatchUploader(
+        args.repo_id, args.token, args.manifest, args.ingest_workers,
+        api=HfApi(endpoint=args.endpoint, token=args.token)
+    )
+    
+    if args.verify:
+        ok = uploader.verify(prune=args.prune)
+        raise SystemExit(0 if ok else 1)
     
-    if args.mode == 'test':
-        print("🧪 테스트 모드")
-        val_pairs = get_file_pairs(base_path, "Validation")[:2]
-        uploader.upload_split(val_pairs, 'validation', args.batch_size)
+    try:
+        # 이전 실행이 커밋 직후 중단됐다면 매니페스트 상태부터 복구
+        uploader.recover()
+    
+        if args.mode == 'test':
+            print("🧪 테스트 모드")
+            val_pairs = get_file_pairs(base_path, "Validation")[:2]
+            uploader.upload_split(val_pairs, 'validation', args.batch_size, **pipeline)
         
-    elif args.mode == 'validation':
-        print("📊 Validation 데이터 처리")
-        val_pairs = get_file_pairs(base_path, "Validation")
-        print(f"총 {len(val_pairs)}개 파일")
-        uploader.upload_split(val_pairs, 'validation', args.batch_size)
+        elif args.mode == 'validation':
+            print("📊 Validation 데이터 처리")
+            val_pairs = get_file_pairs(base_path, "Validation")
+            print(f"총 {len(val_pairs)}개 파일")
+            uploader.upload_split(val_pairs, 'validation', args.batch_size, **pipeline)
         
-    elif args.mode == 'training':
-        print("📚 Training 데이터 처리")
-        train_pairs = get_file_pairs(base_path, "Training")
-        print(f"총 {len(train_pairs)}개 파일")
-        uploader.upload_split(train_pairs, 'train', args.batch_size)
+        elif args.mode == 'training':
+            print("📚 Training 데이터 처리")
+            train_pairs = get_file_pairs(base_path, "Training")
+            print(f"총 {len(train_pairs)}개 파일")
+            uploader.upload_split(train_pairs, 'train', args.batch_size, **pipeline)
         
-    elif args.mode == 'all':
-        print("🌟 전체 데이터 처리")
+        elif args.mode == 'all':
+            print("🌟 전체 데이터 처리")
         
-        # Validation
-        val_pairs = get_file_pairs(base_path, "Validation")
-        print(f"\n🔍 Validation: {len(val_pairs)}개 파일")
-        uploader.upload_split(val_pairs, 'validation', args.batch_size)
+            # Validation
+            val_pairs = get_file_pairs(base_path, "Validation")
+            print(f"\n🔍 Validation: {len(val_pairs)}개 파일")
+            uploader.upload_split(val_pairs, 'validation', args.batch_size, **pipeline)
         
-        # Training
-        train_pairs = get_file_pairs(base_path, "Training")
-        print(f"\n📚 Training: {len(train_pairs)}개 파일")
-        uploader.upload_split(train_pairs, 'train', args.batch_size)
+            # Training
+            train_pairs = get_file_pairs(base_path, "Training")
+            print(f"\n📚 Training: {len(train_pairs)}개 파일")
+            uploader.upload_split(train_pairs, 'train', args.batch_size, **pipeline)
         
-        print(f"\n✅ 모든 작업 완료!")
-        print(f"🔗 https://huggingface.co/datasets/{args.repo_id}")
+            print(f"\n✅ 모든 작업 완료!")
+            print(f"🔗 https://huggingface.co/datasets/{args.repo_id}")
+    
+        # 데이터셋 카드/메타데이터는 마지막에 한 번만 갱신
+        uploader.finalize()
+    finally:
+        uploader.close()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
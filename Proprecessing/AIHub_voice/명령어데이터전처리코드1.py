@@ -1,33 +1,223 @@
 #!/usr/bin/env python3
 import os
 import json
+import math
+import base64
+import sqlite3
+import hashlib
+import argparse
 import pandas as pd
 from pathlib import Path
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from itertools import repeat
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed
 
-def parse_json_file(file_path):
+# 추출 필드: (컬럼명, JSON 섹션, 키)
+FIELD_SPECS = [
+    ('LabelText', '전사정보', 'LabelText'),
+    ('FileName', '파일정보', 'FileName'),
+    ('QualityStatus', '기타정보', 'QualityStatus'),
+    ('SamplingRate', '음성정보', 'SamplingRate'),
+    ('Gender', '화자정보', 'Gender'),
+    ('Age', '화자정보', 'Age'),
+    ('Dialect', '화자정보', 'Dialect'),
+]
+FIELDS = [name for name, _, _ in FIELD_SPECS]
+# 값 종류가 적은 컬럼: Parquet 딕셔너리 인코딩 + 분포 통계 대상
+CATEGORICAL_FIELDS = ['Gender', 'Age', 'Dialect', 'QualityStatus']
+CROSSTAB_FIELDS = [('Age', 'Gender'), ('Dialect', 'QualityStatus')]
+DISTINCT_FIELDS = ['LabelText']   # 고유값 수를 근사(HyperLogLog)로 세는 텍스트 컬럼
+HLL_PRECISION = 14   # 레지스터 2^14개 (16KB, 표준오차 약 0.8%)
+
+DEFAULT_MAX_WORKERS = 8
+DEFAULT_CHUNK_SIZE = 2000   # 프로세스 작업 1개당 파일 수
+INDEX_FILENAME = 'label_index.sqlite'   # 증분 추출용 인덱스 (data_path 아래에 생성)
+PREVIEW_ROWS = 5
+SINK_BATCH_ROWS = 64 * 1024   # 이만큼 모아서 기록 (Parquet row group 크기)
+DECODERS = ('auto', 'orjson', 'msgspec', 'json')
+
+_decoder_cache = {}
+
+def get_json_decoder(name='auto'):
+    """bytes → dict 디코더 반환 (auto: orjson → msgspec → json 순으로 설치된 것 사용)"""
+    if name in _decoder_cache:
+        return _decoder_cache[name]
+    
+    candidates = ['orjson', 'msgspec', 'json'] if name == 'auto' else [name]
+    decoder = None
+    for candidate in candidates:
+        try:
+            if candidate == 'orjson':
+                import orjson
+                decoder = orjson.loads
+            elif candidate == 'msgspec':
+                import msgspec
+                decoder = msgspec.json.Decoder().decode
+            else:
+                decoder = json.loads
+            break
+        except ImportError:
+            if name != 'auto':
+                raise ImportError(f"{candidate} 패키지가 필요합니다: pip install {candidate}")
+    
+    _decoder_cache[name] = decoder
+    return decoder
+
+def extract_fields(data):
+    """파싱된 라벨 JSON에서 필요한 필드들 추출"""
+    return {
+        name: data.get(section, {}).get(key, 'N/A')
+        for name, section, key in FIELD_SPECS
+    }
+
+def parse_json_file(file_path, decoder='auto'):
     """단일 JSON 파일을 파싱하여 필요한 필드를 추출"""
     try:
-        with open(file_path, 'r', encoding='utf-8') as f:
-            data = json.load(f)
+        with open(file_path, 'rb') as f:
+            data = get_json_decoder(decoder)(f.read())
         
-        # 필요한 필드들 추출
-        result = {
-            'LabelText': data.get('전사정보', {}).get('LabelText', 'N/A'),
-            'FileName': data.get('파일정보', {}).get('FileName', 'N/A'),
-            'QualityStatus': data.get('기타정보', {}).get('QualityStatus', 'N/A'),
-            'SamplingRate': data.get('음성정보', {}).get('SamplingRate', 'N/A'),
-            'Gender': data.get('화자정보', {}).get('Gender', 'N/A'),
-            'Age': data.get('화자정보', {}).get('Age', 'N/A'),
-            'Dialect': data.get('화자정보', {}).get('Dialect', 'N/A'),
-        }
-        
-        return result
+        return extract_fields(data)
     
     except Exception as e:
         print(f"Error parsing {file_path}: {e}")
         return None
 
+def empty_columns():
+    """컬럼 형식 결과 ({컬럼명: 값 리스트}) 초기값"""
+    return {name: [] for name in FIELDS}
+
+def append_record(columns, record):
+    for name in FIELDS:
+        columns[name].append(record[name])
+
+def extend_columns(columns, chunk_columns):
+    for name in FIELDS:
+        columns[name].extend(chunk_columns[name])
+
+def num_rows(results):
+    """컬럼 형식 결과의 행 수"""
+    return len(results['FileName']) if results else 0
+
+def parse_json_chunk(file_paths, decoder='auto'):
+    """파일 묶음을 한 프로세스에서 파싱 (프로세스 풀 작업 단위)
+    
+    반환: (성공한 파일 경로 리스트, 컬럼 형식 결과)
+    """
+    ok_paths = []
+    columns = empty_columns()
+    for file_path in file_paths:
+        record = parse_json_file(file_path, decoder)
+        if record:
+            ok_paths.append(file_path)
+            append_record(columns, record)
+    return ok_paths, columns
+
+def parse_files(file_paths, max_workers=4, mode='process', chunk_size=DEFAULT_CHUNK_SIZE, decoder='auto'):
+    """파일들을 병렬 파싱하며 작업 단위마다 (처리한 경로, 성공한 경로, 컬럼 형식 결과)를 yield
+    
+    mode='process': 파일을 chunk_size개씩 묶어 프로세스 풀에서 파싱 (코어 수만큼 확장)
+    mode='thread': 파일 단위로 스레드 풀에서 파싱 (기존 방식)
+    """
+    total = len(file_paths)
+    processed_count = 0
+    
+    if mode == 'process':
+        # 프로세스 풀: JSON 파싱은 CPU 작업이라 GIL을 피해 코어별로 처리
+        # 파일 단위 대신 묶음 단위로 제출해 future/IPC 오버헤드를 줄임
+        chunks = [file_paths[i:i + chunk_size] for i in range(0, total, chunk_size)]
+        
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            for chunk, (ok_paths, chunk_columns) in zip(chunks, executor.map(parse_json_chunk, chunks, repeat(decoder))):
+                processed_count += len(chunk)
+                print(f"처리 완료: {processed_count}/{total}")
+                yield chunk, ok_paths, chunk_columns
+    else:
+        # 멀티스레딩으로 처리
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            # 모든 파일을 병렬로 처리
+            future_to_file = {
+                executor.submit(parse_json_file, json_file, decoder): json_file 
+                for json_file in file_paths
+            }
+            
+            for future in as_completed(future_to_file):
+                json_file = future_to_file.pop(future)
+                result = future.result()
+                columns = empty_columns()
+                if result:
+                    append_record(columns, result)
+                
+                processed_count += 1
+                if processed_count % 1000 == 0:
+                    print(f"처리 완료: {processed_count}/{total}")
+                yield [json_file], [json_file] if result else [], columns
+
+class LabelIndex:
+    """라벨 추출 결과 SQLite 인덱스 (키: 파일 경로, 크기/mtime이 바뀐 파일만 다시 파싱)"""
+    
+    def __init__(self, path):
+        self.path = Path(path)
+        self.conn = sqlite3.connect(self.path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        field_columns = ", ".join(f'"{name}"' for name in FIELDS)
+        # ok=0: 파싱 실패한 파일 (바뀌기 전까지 다시 파싱하지 않음)
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS labels ("
+            "path TEXT PRIMARY KEY, size INTEGER NOT NULL, mtime_ns INTEGER NOT NULL, "
+            f"ok INTEGER NOT NULL, {field_columns})"
+        )
+        self.conn.commit()
+    
+    def diff(self, files):
+        """현재 파일 목록 {경로: (크기, mtime)}과 비교해 (새로/변경된 경로, 삭제된 경로) 반환"""
+        known = {
+            path: (size, mtime_ns)
+            for path, size, mtime_ns in self.conn.execute("SELECT path, size, mtime_ns FROM labels")
+        }
+        changed = [path for path, stat in files.items() if known.get(path) != stat]
+        deleted = [path for path in known if path not in files]
+        return changed, deleted
+    
+    def remove(self, paths):
+        self.conn.executemany("DELETE FROM labels WHERE path = ?", [(path,) for path in paths])
+        self.conn.commit()
+    
+    def upsert(self, paths, ok_paths, columns, files):
+        """파싱 결과 저장 (작업 단위마다 커밋해 중단돼도 진행분 유지)"""
+        ok_set = set(ok_paths)
+        rows = []
+        for i, path in enumerate(ok_paths):
+            values = [columns[name][i] for name in FIELDS]
+            values = [json.dumps(v, ensure_ascii=False) if isinstance(v, (dict, list)) else v for v in values]
+            rows.append((path, *files[path], 1, *values))
+        for path in paths:
+            if path not in ok_set:
+                rows.append((path, *files[path], 0, *([None] * len(FIELDS))))
+        
+        placeholders = ",".join("?" * (4 + len(FIELDS)))
+        self.conn.executemany(f"INSERT OR REPLACE INTO labels VALUES ({placeholders})", rows)
+        self.conn.commit()
+    
+    def iter_batches(self, batch_size=DEFAULT_CHUNK_SIZE):
+        """파싱에 성공한 모든 파일의 필드를 경로 순서대로 batch_size행씩 컬럼 형식으로 yield"""
+        field_columns = ", ".join(f'"{name}"' for name in FIELDS)
+        cursor = self.conn.execute(f"SELECT {field_columns} FROM labels WHERE ok = 1 ORDER BY path")
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                break
+            columns = empty_columns()
+            for row in rows:
+                for name, value in zip(FIELDS, row):
+                    columns[name].append(value)
+            yield columns
+    
+    def count_failed(self):
+        return self.conn.execute("SELECT COUNT(*) FROM labels WHERE ok = 0").fetchone()[0]
+    
+    def close(self):
+        self.conn.close()
+
 def find_label_folders(data_path):
     """Validation 폴더에서 모든 [라벨] 폴더를 찾기"""
     validation_dir = Path(data_path)
@@ -44,118 +234,390 @@ def find_label_folders(data_path):
     
     return label_folders
 
-def extract_all_data(data_path, max_workers=4):
-    """Validation 폴더의 모든 라벨 데이터를 추출"""
+def scan_json_files(folder):
+    """폴더의 JSON 파일을 {경로: (크기, mtime_ns)}로 반환 (os.scandir로 stat을 함께 수집)"""
+    files = {}
+    with os.scandir(folder) as entries:
+        for entry in entries:
+            if entry.name.endswith('.json') and entry.is_file():
+                stat = entry.stat()
+                files[entry.path] = (stat.st_size, stat.st_mtime_ns)
+    return files
+
+def iter_label_batches(
+    data_path,
+    max_workers=4,
+    mode='process',
+    chunk_size=DEFAULT_CHUNK_SIZE,
+    decoder='auto',
+    index_path=None
+):
+    """Validation 폴더의 모든 라벨 데이터를 컬럼 형식({컬럼명: 값 리스트}) 묶음으로 yield
+    
+    index_path를 주면 인덱스에 없거나 크기/mtime이 바뀐 파일만 파싱하고
+    삭제된 파일은 인덱스에서 제거한 뒤, 인덱스 전체를 묶음으로 yield
+    """
     
     print(f"Validation 폴더 스캔 중: {data_path}")
     label_folders = find_label_folders(data_path)
     
     if not label_folders:
         print("라벨 폴더를 찾을 수 없습니다.")
-        return []
+        return
     
     print(f"발견된 라벨 폴더: {len(label_folders)}개")
     for folder in label_folders:
         print(f"  - {folder.name}")
     
     # 모든 JSON 파일 수집
-    all_json_files = []
+    all_json_files = {}
     for folder in label_folders:
-        json_files = list(folder.glob("*.json"))
+        json_files = scan_json_files(folder)
         print(f"{folder.name}: {len(json_files)}개 JSON 파일")
-        all_json_files.extend(json_files)
-    
-    print(f"\n총 {len(all_json_files)}개 JSON 파일 처리 시작...")
-    
-    # 멀티스레딩으로 빠르게 처리
-    results = []
-    processed_count = 0
+        all_json_files.update(json_files)
     
-    with ThreadPoolExecutor(max_workers=max_workers) as executor:
-        # 모든 파일을 병렬로 처리
-        future_to_file = {
-            executor.submit(parse_json_file, json_file): json_file 
-            for json_file in all_json_files
-        }
+    if index_path is None:
+        print(f"\n총 {len(all_json_files)}개 JSON 파일 처리 시작... (모드: {mode}, 워커: {max_workers})")
         
-        for future in as_completed(future_to_file):
-            result = future.result()
-            if result:
-                results.append(result)
+        for _, _, chunk_columns in parse_files(list(all_json_files), max_workers, mode, chunk_size, decoder):
+            if num_rows(chunk_columns):
+                yield chunk_columns
+    else:
+        index = LabelIndex(index_path)
+        try:
+            changed, deleted = index.diff(all_json_files)
+            print(f"\n📇 인덱스: {index_path}")
+            print(f"  새로/변경: {len(changed)}개, 삭제: {len(deleted)}개, "
+                  f"변경 없음: {len(all_json_files) - len(changed)}개")
+            index.remove(deleted)
+            
+            if changed:
+                print(f"\n{len(changed)}개 JSON 파일 처리 시작... (모드: {mode}, 워커: {max_workers})")
+                for paths, ok_paths, chunk_columns in parse_files(changed, max_workers, mode, chunk_size, decoder):
+                    index.upsert(paths, ok_paths, chunk_columns, all_json_files)
             
-            processed_count += 1
-            if processed_count % 1000 == 0:
-                print(f"처리 완료: {processed_count}/{len(all_json_files)}")
+            failed = index.count_failed()
+            if failed:
+                print(f"⚠️ 파싱 실패 파일: {failed}개 (수정되면 다음 실행에서 다시 파싱)")
+            yield from index.iter_batches(chunk_size)
+        finally:
+            index.close()
+
+def extract_all_data(data_path, max_workers=4, mode='process', chunk_size=DEFAULT_CHUNK_SIZE, decoder='auto', index_path=None):
+    """Validation 폴더의 모든 라벨 데이터를 추출해 컬럼 형식으로 반환 (전체를 메모리에 모음)"""
+    results = empty_columns()
+    for columns in iter_label_batches(data_path, max_workers, mode, chunk_size, decoder, index_path):
+        extend_columns(results, columns)
     
-    print(f"✅ 총 {len(results)}개 데이터 추출 완료!")
+    print(f"✅ 총 {num_rows(results)}개 데이터 추출 완료!")
     return results
 
-def save_results(results, data_path, format='csv'):
-    """결과를 파일로 저장"""
-    if not results:
-        print("저장할 데이터가 없습니다.")
-        return
+class HyperLogLog:
+    """고유값 수 근사 카운터 (메모리 2^precision 바이트 고정, 레지스터 max로 병합)"""
     
-    validation_dir = Path(data_path)
+    def __init__(self, precision=HLL_PRECISION, registers=None):
+        self.precision = precision
+        self.m = 1 << precision
+        self.registers = bytearray(registers) if registers is not None else bytearray(self.m)
+    
+    def add(self, value):
+        digest = hashlib.blake2b(str(value).encode('utf-8'), digest_size=8).digest()
+        x = int.from_bytes(digest, 'big')
+        index = x >> (64 - self.precision)
+        rest = x & ((1 << (64 - self.precision)) - 1)
+        rank = (64 - self.precision) - rest.bit_length() + 1
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+    
+    def update(self, values):
+        for value in values:
+            self.add(value)
+    
+    def merge(self, other):
+        if other.precision != self.precision:
+            raise ValueError(f"HyperLogLog precision이 다릅니다: {self.precision} != {other.precision}")
+        self.registers = bytearray(max(a, b) for a, b in zip(self.registers, other.registers))
+        return self
+    
+    def count(self):
+        alpha = 0.7213 / (1 + 1.079 / self.m)
+        estimate = alpha * self.m * self.m / sum(2.0 ** -r for r in self.registers)
+        zeros = self.registers.count(0)
+        if estimate <= 2.5 * self.m and zeros:
+            # 작은 범위 보정 (linear counting)
+            estimate = self.m * math.log(self.m / zeros)
+        return int(round(estimate))
 
+class StreamingStats:
+    """한 번 훑으며 누적하는 분포 통계 (메모리: 고유값 수에 비례)
     
-    if format == 'csv':
-        output_file = validation_dir / 'extracted_data.csv'
-        df = pd.DataFrame(results)
-        df.to_csv(output_file, index=False, encoding='utf-8')
-        print(f"📁 CSV 파일 저장: {output_file}")
+    - fields: 컬럼별 값 분포
+    - crosstabs: (컬럼 A, 컬럼 B) 교차 분포
+    - distinct_fields: 고유값 수 근사 (HyperLogLog)
+    워커/샤드별 부분 통계는 merge()나 to_dict()/from_dict()로 합칠 수 있음
+    """
     
-def show_statistics(results):
-    """데이터 통계 출력"""
-    if not results:
-        return
+    def __init__(self, fields=CATEGORICAL_FIELDS, crosstabs=CROSSTAB_FIELDS, distinct_fields=DISTINCT_FIELDS, hll_precision=HLL_PRECISION):
+        self.fields = list(fields)
+        self.crosstab_fields = [tuple(pair) for pair in crosstabs]
+        self.distinct_fields = list(distinct_fields)
+        self.total = 0
+        self.counts = {field: Counter() for field in self.fields}
+        self.crosstabs = {pair: Counter() for pair in self.crosstab_fields}
+        self.distinct = {field: HyperLogLog(hll_precision) for field in self.distinct_fields}
     
-    df = pd.DataFrame(results)
+    def update(self, columns):
+        """컬럼 형식 묶음 1개 반영"""
+        self.total += num_rows(columns)
+        for field in self.fields:
+            self.counts[field].update(columns[field])
+        for a, b in self.crosstab_fields:
+            self.crosstabs[(a, b)].update(zip(columns[a], columns[b]))
+        for field in self.distinct_fields:
+            self.distinct[field].update(columns[field])
     
-    print(f"\n📊 데이터 통계")
-    print(f"총 샘플 수: {len(results):,}개")
+    def merge(self, other):
+        """다른 부분 통계를 합침 (같은 설정이어야 함)"""
+        if (self.fields, self.crosstab_fields, self.distinct_fields) != (other.fields, other.crosstab_fields, other.distinct_fields):
+            raise ValueError("통계 설정(fields/crosstabs/distinct_fields)이 다릅니다.")
+        self.total += other.total
+        for field in self.fields:
+            self.counts[field].update(other.counts[field])
+        for pair in self.crosstab_fields:
+            self.crosstabs[pair].update(other.crosstabs[pair])
+        for field in self.distinct_fields:
+            self.distinct[field].merge(other.distinct[field])
+        return self
     
-    print(f"\n👥 성별 분포:")
-    gender_counts = df['Gender'].value_counts()
-    for gender, count in gender_counts.items():
-        print(f"  {gender}: {count:,}개")
+    def distinct_count(self, field):
+        return self.distinct[field].count()
     
-    print(f"\n🎂 나이 분포:")
-    age_counts = df['Age'].value_counts()
-    for age, count in age_counts.items():
-        print(f"  {age}: {count:,}개")
+    def to_dict(self):
+        """JSON으로 저장 가능한 형태 (부분 통계 보관/병합용)"""
+        return {
+            'total': self.total,
+            'fields': self.fields,
+            'crosstab_fields': [list(pair) for pair in self.crosstab_fields],
+            'distinct_fields': self.distinct_fields,
+            'counts': {field: [[value, count] for value, count in counter.items()] for field, counter in self.counts.items()},
+            'crosstabs': [
+                [[a, b], [[va, vb, count] for (va, vb), count in self.crosstabs[(a, b)].items()]]
+                for a, b in self.crosstab_fields
+            ],
+            'distinct': {
+                field: {'precision': hll.precision, 'registers': base64.b64encode(bytes(hll.registers)).decode('ascii')}
+                for field, hll in self.distinct.items()
+            },
+        }
     
-    print(f"\n🗣️ 방언 분포:")
-    dialect_counts = df['Dialect'].value_counts()
-    for dialect, count in dialect_counts.items():
-        print(f"  {dialect}: {count:,}개")
+    @classmethod
+    def from_dict(cls, data):
+        distinct = data['distinct']
+        precision = next(iter(distinct.values()))['precision'] if distinct else HLL_PRECISION
+        stats = cls(data['fields'], data['crosstab_fields'], data['distinct_fields'], precision)
+        stats.total = data['total']
+        for field, items in data['counts'].items():
+            stats.counts[field] = Counter({value: count for value, count in items})
+        for (a, b), items in data['crosstabs']:
+            stats.crosstabs[(a, b)] = Counter({(va, vb): count for va, vb, count in items})
+        for field, hll in distinct.items():
+            stats.distinct[field] = HyperLogLog(hll['precision'], base64.b64decode(hll['registers']))
+        return stats
     
-    print(f"\n✅ 품질 분포:")
-    quality_counts = df['QualityStatus'].value_counts()
-    for quality, count in quality_counts.items():
-        print(f"  {quality}: {count:,}개")
+    def save(self, path):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f, ensure_ascii=False)
+    
+    @classmethod
+    def load(cls, path):
+        with open(path, 'r', encoding='utf-8') as f:
+            return cls.from_dict(json.load(f))
+
+class LabelSink:
+    """추출 결과 스트리밍 저장 (묶음마다 기록, 통계/미리보기도 함께 갱신)
+    
+    parquet: Arrow 레코드 배치로 기록, CATEGORICAL_FIELDS는 딕셔너리 인코딩
+    csv: 묶음마다 이어 쓰기
+    작은 묶음은 batch_rows행까지 모았다가 한 번에 기록
+    임시 파일(<출력>.tmp)에 쓰고 close()에서 교체하므로 실패/중단 시 이전 결과 파일이 유지됨
+    """
+    
+    def __init__(self, output_file, format='parquet', batch_rows=SINK_BATCH_ROWS):
+        self.output_file = Path(output_file)
+        self.tmp_file = self.output_file.with_name(self.output_file.name + '.tmp')
+        self.format = format
+        self.batch_rows = batch_rows
+        self.stats = StreamingStats()
+        self.preview = empty_columns()
+        self.buffer = empty_columns()
+        self.written = 0
+        self.writer = None
+        self.schema = None
+        
+        if format == 'parquet':
+            try:
+                import pyarrow as pa
+                import pyarrow.parquet as pq
+            except ImportError:
+                raise ImportError("parquet 저장에는 pyarrow가 필요합니다: pip install pyarrow")
+            self.pa = pa
+            self.schema = pa.schema([
+                (name, pa.dictionary(pa.int32(), pa.string()) if name in CATEGORICAL_FIELDS else pa.string())
+                for name in FIELDS
+            ])
+            self.writer = pq.ParquetWriter(
+                self.tmp_file, self.schema, compression='zstd', use_dictionary=CATEGORICAL_FIELDS
+            )
+        elif self.tmp_file.exists():
+            self.tmp_file.unlink()
+    
+    @property
+    def total(self):
+        return self.stats.total
+    
+    def write(self, columns):
+        rows = num_rows(columns)
+        if not rows:
+            return
+        
+        self.stats.update(columns)
+        missing = PREVIEW_ROWS - num_rows(self.preview)
+        if missing > 0:
+            for name in FIELDS:
+                self.preview[name].extend(columns[name][:missing])
+        
+        extend_columns(self.buffer, columns)
+        if num_rows(self.buffer) >= self.batch_rows:
+            self.flush()
+    
+    def flush(self):
+        columns, self.buffer = self.buffer, empty_columns()
+        rows = num_rows(columns)
+        if not rows:
+            return
+        
+        if self.format == 'parquet':
+            # 'N/A'와 숫자가 섞일 수 있어 모두 문자열로 저장 (CSV와 같은 값)
+            arrays = []
+            for name in FIELDS:
+                values = [None if value is None else str(value) for value in columns[name]]
+                array = self.pa.array(values, type=self.pa.string())
+                arrays.append(array.dictionary_encode() if name in CATEGORICAL_FIELDS else array)
+            self.writer.write_batch(self.pa.RecordBatch.from_arrays(arrays, schema=self.schema))
+        else:
+            pd.DataFrame(columns, columns=FIELDS).to_csv(
+                self.tmp_file, mode='a', header=self.written == 0, index=False, encoding='utf-8'
+            )
+        self.written += rows
+    
+    def close(self, commit=True):
+        """기록 마무리 - commit이면 임시 파일을 출력 파일로 교체, 아니면 임시 파일만 삭제"""
+        if commit:
+            self.flush()
+        if self.writer is not None:
+            self.writer.close()
+            self.writer = None
+        if commit and self.tmp_file.exists():
+            os.replace(self.tmp_file, self.output_file)
+        elif self.tmp_file.exists():
+            self.tmp_file.unlink()
+
+def show_statistics(stats):
+    """데이터 통계 출력 (StreamingStats 또는 컬럼 형식 결과)"""
+    if not isinstance(stats, StreamingStats):
+        results, stats = stats, StreamingStats()
+        stats.update(results)
+    if not stats.total:
+        return
+    
+    print(f"\n📊 데이터 통계")
+    print(f"총 샘플 수: {stats.total:,}개")
+    
+    titles = {
+        'Gender': "👥 성별 분포",
+        'Age': "🎂 나이 분포",
+        'Dialect': "🗣️ 방언 분포",
+        'QualityStatus': "✅ 품질 분포",
+    }
+    for field in stats.fields:
+        print(f"\n{titles.get(field, field)}:")
+        for value, count in stats.counts[field].most_common():
+            print(f"  {value}: {count:,}개")
+    
+    for a, b in stats.crosstab_fields:
+        counter = stats.crosstabs[(a, b)]
+        if not counter:
+            continue
+        print(f"\n🔀 {a} × {b}:")
+        table = pd.Series(counter).unstack(fill_value=0)
+        print(table.to_string())
+    
+    for field in stats.distinct_fields:
+        print(f"\n🔢 {field} 고유값 수 (근사): 약 {stats.distinct_count(field):,}개")
 
 def main():
-    # 사용자 설정
-    data_path = "."
+    parser = argparse.ArgumentParser(description="AIHub 명령어 음성 라벨 JSON 추출")
+    parser.add_argument("--data-path", default=".", help="[라벨] 폴더들이 있는 경로 (기본: .)")
+    parser.add_argument("--max-workers", type=int, default=DEFAULT_MAX_WORKERS, help=f"병렬 워커 수 (기본: {DEFAULT_MAX_WORKERS})")
+    parser.add_argument("--mode", choices=['process', 'thread'], default='process', help="병렬 방식 (기본: process)")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help=f"프로세스 작업 1개당 파일 수 (기본: {DEFAULT_CHUNK_SIZE})")
+    parser.add_argument("--decoder", choices=DECODERS, default='auto', help="JSON 디코더 (기본: auto = orjson → msgspec → json)")
+    parser.add_argument("--index", help=f"증분 추출 인덱스 경로 (기본: <data-path>/{INDEX_FILENAME})")
+    parser.add_argument("--no-index", action="store_true", help="인덱스 없이 모든 파일을 다시 파싱")
+    parser.add_argument("--format", choices=['parquet', 'csv'], default='parquet', help="저장 형식 (기본: parquet)")
+    parser.add_argument("--output", "-o", help="저장 경로 (기본: <data-path>/extracted_data.<format>)")
+    parser.add_argument("--stats-json", help="통계를 JSON으로 저장 (다른 실행/샤드와 병합 가능)")
+    parser.add_argument("--merge-stats", nargs="+", metavar="JSON", help="저장된 통계 JSON들을 병합해 출력만 하고 종료")
     
-    # 데이터 추출
-    results = extract_all_data(data_path, max_workers=8)
+    args = parser.parse_args()
     
-    if results:
-        # 통계 출력
-        show_statistics(results)
+    if args.merge_stats:
+        stats = StreamingStats.load(args.merge_stats[0])
+        for path in args.merge_stats[1:]:
+            stats.merge(StreamingStats.load(path))
+        show_statistics(stats)
+        if args.stats_json:
+            stats.save(args.stats_json)
+            print(f"\n📁 병합 통계 저장: {args.stats_json}")
+        return
+    
+    data_path = args.data_path
+    index_path = None if args.no_index else (args.index or Path(data_path) / INDEX_FILENAME)
+    output_file = Path(args.output or Path(data_path) / f"extracted_data.{args.format}")
+    
+    # 데이터 추출: 묶음 단위로 바로 저장하고 통계만 누적 (전체 결과를 메모리에 모으지 않음)
+    sink = LabelSink(output_file, format=args.format)
+    try:
+        for columns in iter_label_batches(
+            data_path,
+            max_workers=args.max_workers,
+            mode=args.mode,
+            chunk_size=args.chunk_size,
+            decoder=args.decoder,
+            index_path=index_path
+        ):
+            sink.write(columns)
+    except BaseException:
+        sink.close(commit=False)   # 이전 결과 파일은 그대로 둠
+        raise
+    sink.close(commit=sink.total > 0)   # 추출된 행이 없으면 이전 결과 파일은 그대로 둠
+    
+    if sink.total:
+        print(f"✅ 총 {sink.total}개 데이터 추출 완료!")
+        print(f"📁 {args.format.upper()} 파일 저장: {output_file}")
         
-        # 결과 저장
-        save_results(results, data_path, format='csv')
+        # 통계 출력
+        show_statistics(sink.stats)
+        if args.stats_json:
+            sink.stats.save(args.stats_json)
+            print(f"📁 통계 저장: {args.stats_json}")
         
-        print(f"\n🎉 완료! {len(results)}개 데이터가 추출되었습니다.")
+        print(f"\n🎉 완료! {sink.total}개 데이터가 추출되었습니다.")
         print(f"📁 저장 위치: {data_path}")
         
         # 샘플 데이터 미리보기
         print(f"\n👀 샘플 데이터:")
-        df = pd.DataFrame(results)
-        print(df.head())
+        print(pd.DataFrame(sink.preview))
         
     else:
         print("❌ 추출된 데이터가 없습니다.")
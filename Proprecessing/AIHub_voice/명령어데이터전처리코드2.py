@@ -1,70 +1,228 @@
 #!/usr/bin/env python
 # coding: utf-8
-import pandas as pd 
+import os
+import json
+import pandas as pd
 from glob import glob
 from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, FIRST_COMPLETED, wait
+import pyarrow as pa
+import pyarrow.parquet as pq
 from huggingface_hub import HfApi, create_repo
-from datasets import Dataset, Audio, DatasetDict
-
-data_path = "."
-csv_path = Path(data_path) / "extracted_data.csv"
-
-df = pd.read_csv(csv_path)
-data_dir = Path(data_path)
-source_folders = [item for item in data_dir.iterdir() 
-                     if item.is_dir() and item.name.startswith('[원천]')]
-len(source_folders), source_folders[-1]
-
-
-all_files = []
-for folder in source_folders:
-    wav_files = list(folder.rglob("*.wav"))
-    for wav_file in wav_files:
-            all_files.append({
-                'FileName': wav_file.name,
-                'AudioPath': str(wav_file),
-            })
-
-source_df = pd.DataFrame(all_files)
-merged_df = df.merge(source_df, on='FileName', how='left')
-
-# 결과 확인
-print(f"Original df: {len(df):,}개")
-print(f"Source df: {len(source_df):,}개") 
-print(f"Merged df: {len(merged_df):,}개")
-
-# 매칭 결과
-matched_count = merged_df['AudioPath'].notna().sum()
-print(f"매칭된 레코드: {matched_count:,}개")
-print(f"매칭률: {matched_count/len(merged_df)*100:.1f}%")
-
-df = merged_df[merged_df['AudioPath'].notna()].copy()
-
-print(f"📊 {len(df):,}개 샘플로 데이터셋 생성")
-
-# 필요한 컬럼만
-dataset_df = df[['LabelText', 'AudioPath', 'Gender', 'Age', 'Dialect']].copy()
-dataset_df.columns = ['text', 'audio', 'gender', 'age', 'dialect']
-dataset = Dataset.from_pandas(dataset_df)
-dataset = dataset.cast_column("audio", Audio())
-
-dataset_dict = DatasetDict({
-    "validation": dataset
+from datasets import Audio, Features, Value
+
+SCAN_WORKERS = 16   # 디렉터리 스캔 스레드 수 (scandir는 I/O 대기 중 GIL을 놓음)
+REPORT_EXAMPLES = 20   # 리포트에 남길 중복/누락 예시 수
+NUM_SHARDS = os.cpu_count() or 4   # 샤드 수 = 워커 프로세스 수
+MAX_SHARD_BYTES = 500 * 1024 * 1024   # Parquet 파일 1개 최대 크기 (넘으면 다음 파일로)
+ROW_GROUP_BYTES = 64 * 1024 * 1024   # 워커가 메모리에 모으는 최대 음성 바이트 (row group 단위)
+
+FEATURES = Features({
+    'text': Value('string'),
+    'audio': Audio(),
+    'gender': Value('string'),
+    'age': Value('string'),
+    'dialect': Value('string'),
 })
 
-dataset.save_to_disk("./dataset_folder")
-repo_id = "your_repo_id/your_dataset_name"
-create_repo(repo_id, repo_type="dataset", private=True, exist_ok=True)
-
-# 대용량 파일은 이렇게 올리는게 좋습니다. 
-api = HfApi()
-
-api.upload_large_folder(
-    folder_path="./dataset_folder",
-    repo_id=repo_id, 
-    repo_type="dataset",
-    private=True
-)
-
-print("✅ 업로드 완료!")
 
+def scan_directory(path, suffix):
+    """디렉터리 1개를 os.scandir로 읽어 (파일 [(이름, 경로)], 하위 디렉터리 [경로]) 반환"""
+    files, subdirs = [], []
+    with os.scandir(path) as entries:
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                subdirs.append(entry.path)
+            elif entry.name.endswith(suffix):
+                files.append((entry.name, entry.path))
+    return files, subdirs
+
+
+def build_audio_index(folders, suffix=".wav", max_workers=SCAN_WORKERS):
+    """폴더들을 병렬로 재귀 스캔해 파일명 → 경로 dict 생성
+
+    반환: (name_to_path, duplicates)
+    duplicates: 같은 파일명이 여러 경로에 있을 때 {파일명: [경로...]} (name_to_path에는 정렬상 첫 경로)
+    """
+    name_to_paths = {}
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        pending = {executor.submit(scan_directory, str(folder), suffix) for folder in folders}
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                files, subdirs = future.result()
+                for name, path in files:
+                    name_to_paths.setdefault(name, []).append(path)
+                pending.update(executor.submit(scan_directory, subdir, suffix) for subdir in subdirs)
+
+    name_to_path = {}
+    duplicates = {}
+    for name, paths in name_to_paths.items():
+        if len(paths) > 1:
+            paths.sort()
+            duplicates[name] = paths
+        name_to_path[name] = paths[0]
+    return name_to_path, duplicates
+
+
+def match_audio(df, name_to_path, key="FileName"):
+    """라벨 df의 파일명을 dict로 한 번에 조회 (행 수가 늘어나지 않는 1:1 조인)
+
+    반환: AudioPath 컬럼이 추가된 df (매칭 안 된 행은 None)
+    """
+    df = df.copy()
+    df["AudioPath"] = [name_to_path.get(name) for name in df[key]]
+    return df
+
+
+def write_match_report(report_path, df, duplicates, key="FileName"):
+    """중복/누락을 명시적으로 리포트 (콘솔 요약 + JSON 전체 목록)"""
+    missing = df.loc[df["AudioPath"].isna(), key].tolist()
+    label_duplicates = df.loc[df[key].duplicated(keep=False), key].unique().tolist()
+    label_names = set(df[key])
+    used_duplicates = {name: paths for name, paths in duplicates.items() if name in label_names}
+
+    print(f"누락 (음성 없음): {len(missing):,}개")
+    for name in missing[:REPORT_EXAMPLES]:
+        print(f"  - {name}")
+    print(f"중복 음성 파일명: {len(duplicates):,}개 (라벨과 매칭된 것 {len(used_duplicates):,}개, 정렬상 첫 경로 사용)")
+    for name, paths in list(used_duplicates.items())[:REPORT_EXAMPLES]:
+        print(f"  - {name}: {len(paths)}개 경로")
+    print(f"중복 라벨 파일명: {len(label_duplicates):,}개")
+
+    with open(report_path, "w", encoding="utf-8") as f:
+        json.dump({
+            "missing": missing,
+            "audio_duplicates": duplicates,
+            "label_duplicates": label_duplicates,
+        }, f, ensure_ascii=False, indent=2)
+    print(f"📁 매칭 리포트 저장: {report_path}")
+
+
+def write_dataset_shard(shard_index, records, output_dir, split="validation"):
+    """샤드 1개를 음성 바이트까지 포함한 Parquet 파일들로 기록 (프로세스 풀 작업 단위)
+
+    records: [{'text', 'audio'(경로), 'gender', 'age', 'dialect'}, ...]
+    파일: {output_dir}/data/{split}-{샤드:05d}-{순번:04d}.parquet (MAX_SHARD_BYTES 단위로 나눔)
+    반환: 기록한 파일 경로 리스트
+    """
+    schema = FEATURES.arrow_schema   # datasets가 Audio로 인식하도록 features 메타데이터 포함
+    data_dir = Path(output_dir) / "data"
+    written = []
+    writer = None
+    file_bytes = 0
+    buffer, buffer_bytes = [], 0
+
+    def flush():
+        nonlocal writer, file_bytes, buffer, buffer_bytes
+        if not buffer:
+            return
+        if writer is None:
+            path = data_dir / f"{split}-{shard_index:05d}-{len(written):04d}.parquet"
+            writer = pq.ParquetWriter(path, schema)
+            written.append(str(path))
+            file_bytes = 0
+        writer.write_table(pa.Table.from_pylist(buffer, schema=schema))
+        file_bytes += buffer_bytes
+        buffer, buffer_bytes = [], 0
+        if file_bytes >= MAX_SHARD_BYTES:
+            writer.close()
+            writer = None
+
+    for record in records:
+        audio_bytes = Path(record['audio']).read_bytes()
+        buffer.append({**record, 'audio': {'bytes': audio_bytes, 'path': Path(record['audio']).name}})
+        buffer_bytes += len(audio_bytes)
+        if buffer_bytes >= ROW_GROUP_BYTES:
+            flush()
+    flush()
+    if writer is not None:
+        writer.close()
+    return written
+
+
+def build_sharded_dataset(dataset_df, output_dir, split="validation", num_shards=NUM_SHARDS):
+    """매칭된 목록을 num_shards개로 나눠 워커 프로세스별로 Parquet 샤드 생성
+
+    upload_large_folder로 그대로 올릴 수 있는 data/{split}-*.parquet 구조로 기록
+    """
+    data_dir = Path(output_dir) / "data"
+    data_dir.mkdir(parents=True, exist_ok=True)
+    for old_file in data_dir.glob(f"{split}-*.parquet"):
+        old_file.unlink()   # 이전 실행의 샤드가 섞이지 않게
+
+    records = dataset_df.to_dict('records')
+    num_shards = max(1, min(num_shards, len(records)))
+    shards = [records[i::num_shards] for i in range(num_shards)]
+
+    files = []
+    with ProcessPoolExecutor(max_workers=num_shards) as executor:
+        futures = [
+            executor.submit(write_dataset_shard, index, shard, output_dir, split)
+            for index, shard in enumerate(shards)
+        ]
+        for index, future in enumerate(futures):
+            shard_files = future.result()
+            files.extend(shard_files)
+            print(f"  샤드 {index + 1}/{num_shards}: {len(shards[index]):,}개 → 파일 {len(shard_files)}개")
+    return files
+
+
+def main():
+    data_path = "."
+    parquet_path = Path(data_path) / "extracted_data.parquet"
+    csv_path = Path(data_path) / "extracted_data.csv"
+
+    # 명령어데이터전처리코드1.py 결과 (기본 parquet, 없으면 csv)
+    # csv는 문자열 그대로 읽음 ('N/A'가 NaN, 나이가 int로 바뀌면 string 스키마 기록이 실패)
+    df = pd.read_parquet(parquet_path) if parquet_path.exists() else pd.read_csv(csv_path, dtype=str, keep_default_na=False)
+    df = df.astype({col: str for col in df.select_dtypes("category").columns})   # parquet 딕셔너리 컬럼 → 문자열
+    data_dir = Path(data_path)
+    source_folders = [item for item in data_dir.iterdir()
+                         if item.is_dir() and item.name.startswith('[원천]')]
+
+    name_to_path, duplicates = build_audio_index(source_folders)
+    merged_df = match_audio(df, name_to_path)
+
+    # 결과 확인
+    print(f"Original df: {len(df):,}개")
+    print(f"Source files: {len(name_to_path):,}개")
+    print(f"Merged df: {len(merged_df):,}개")
+
+    # 매칭 결과
+    matched_count = merged_df['AudioPath'].notna().sum()
+    print(f"매칭된 레코드: {matched_count:,}개")
+    print(f"매칭률: {matched_count/len(merged_df)*100:.1f}%")
+    write_match_report(Path(data_path) / "match_report.json", merged_df, duplicates)
+
+    df = merged_df[merged_df['AudioPath'].notna()].copy()
+
+    print(f"📊 {len(df):,}개 샘플로 데이터셋 생성")
+
+    # 필요한 컬럼만
+    dataset_df = df[['LabelText', 'AudioPath', 'Gender', 'Age', 'Dialect']].copy()
+    dataset_df.columns = ['text', 'audio', 'gender', 'age', 'dialect']
+
+    # 샤드별 워커 프로세스에서 음성 바이트를 읽어 Parquet로 기록 (코어 수만큼 병렬)
+    shard_files = build_sharded_dataset(dataset_df, "./dataset_folder", split="validation")
+    print(f"📁 Parquet 샤드 {len(shard_files)}개 생성: ./dataset_folder/data")
+
+    repo_id = "your_repo_id/your_dataset_name"
+    create_repo(repo_id, repo_type="dataset", private=True, exist_ok=True)
+
+    # 대용량 파일은 이렇게 올리는게 좋습니다.
+    api = HfApi()
+
+    api.upload_large_folder(
+        folder_path="./dataset_folder",
+        repo_id=repo_id,
+        repo_type="dataset",
+        private=True
+    )
+
+    print("✅ 업로드 완료!")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,278 @@
+#!/usr/bin/env python3
+"""
+Parquet 음성 샤드의 오디오를 목표 샘플링 레이트로 미리 디코딩/리샘플링하는 전처리 단계
+학습 시 매 epoch마다 MP3/WAV를 디코딩하고 리샘플링하지 않도록 업로드 전에 한 번만 처리
+  사용법:
+
+  python audio_normalize.py --input ./dataset_folder/data --output ./dataset_folder_16k/data --rate 16000
+
+  주요 특징:
+
+  1. 입력: HuggingFace Audio 컬럼({'bytes', 'path'})이 있는 Parquet 샤드 폴더
+     (명령어데이터전처리코드2.py의 dataset_folder, common_voice_22_ko.py export 샤드 등)
+     오디오 컬럼이 없는 샤드(common_voice export의 data/ 메타데이터 등)는 그대로 복사
+  2. 변환: soundfile로 디코딩 (실패 시 librosa), 모노 다운믹스, librosa로 리샘플링,
+     FLAC(16bit) 또는 int16 WAV로 다시 인코딩
+  3. 병렬 처리: 샤드 단위로 프로세스 풀에서 처리, 샤드 안은 row group 단위로 읽고 써서 메모리 일정
+  4. 캐시: (원본 바이트 SHA-256, 목표 레이트, 채널 모드, 형식)을 키로 변환 결과를 파일로 저장해
+     재실행/다른 샤드의 같은 클립은 다시 디코딩하지 않음
+  5. 출력 샤드의 features 메타데이터에 목표 sampling_rate를 기록해 datasets가 그대로 인식
+"""
+
+import io
+import os
+import json
+import shutil
+import hashlib
+import argparse
+from pathlib import Path
+from typing import Dict, Optional
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+# 설정
+DEFAULT_RATE = 16000
+DEFAULT_FORMAT = "flac"
+FORMATS = {
+    # 형식: (soundfile 포맷, subtype, 확장자)
+    "flac": ("FLAC", "PCM_16", "flac"),
+    "int16": ("WAV", "PCM_16", "wav"),
+}
+DEFAULT_CACHE_DIR = Path("audio_cache")
+DEFAULT_WORKERS = os.cpu_count() or 1
+DEFAULT_AUDIO_COLUMN = "audio"
+ROW_GROUP_ROWS = 256  # 한 번에 읽고 쓰는 행 수
+
+
+def decode_audio(data: bytes):
+    """오디오 바이트 → (float32 배열 [채널, 샘플] 또는 [샘플], 샘플링 레이트)"""
+    import soundfile as sf
+
+    try:
+        array, rate = sf.read(io.BytesIO(data), dtype="float32", always_2d=True)
+        return array.T, rate
+    except Exception:
+        # libsndfile이 못 읽는 형식 (오래된 libsndfile의 MP3 등)
+        import librosa
+
+        array, rate = librosa.load(io.BytesIO(data), sr=None, mono=False)
+        return array.astype(np.float32), rate
+
+
+def normalize_audio_bytes(data: bytes, target_rate: int = DEFAULT_RATE, fmt: str = DEFAULT_FORMAT, mono: bool = True) -> bytes:
+    """오디오 1개를 디코딩 → (모노) → 리샘플링 → FLAC/int16 WAV로 인코딩"""
+    import librosa
+    import soundfile as sf
+
+    array, rate = decode_audio(data)
+    if mono and array.ndim > 1:
+        array = librosa.to_mono(array)
+    if rate != target_rate:
+        array = librosa.resample(array, orig_sr=rate, target_sr=target_rate)
+    if array.ndim > 1:
+        array = array.T  # soundfile은 [샘플, 채널]
+
+    format_name, subtype, _ = FORMATS[fmt]
+    buffer = io.BytesIO()
+    sf.write(buffer, np.clip(array, -1.0, 1.0), target_rate, format=format_name, subtype=subtype)
+    return buffer.getvalue()
+
+
+class AudioCache:
+    """변환 결과 파일 캐시 (키: 원본 SHA-256 + 목표 레이트 + 채널 모드 + 형식)
+
+    파일 단위로 원자적으로 기록하므로 여러 워커 프로세스가 동시에 써도 안전
+    """
+
+    def __init__(self, cache_dir: Path = DEFAULT_CACHE_DIR):
+        self.cache_dir = Path(cache_dir)
+        self.hits = 0
+        self.misses = 0
+
+    def path_for(self, source_hash: str, target_rate: int, fmt: str, mono: bool) -> Path:
+        ext = FORMATS[fmt][2]
+        channels = "mono" if mono else "orig"
+        return self.cache_dir / source_hash[:2] / f"{source_hash}_{target_rate}_{channels}.{ext}"
+
+    def get(self, source_hash: str, target_rate: int, fmt: str, mono: bool) -> Optional[bytes]:
+        path = self.path_for(source_hash, target_rate, fmt, mono)
+        if path.exists():
+            self.hits += 1
+            return path.read_bytes()
+        self.misses += 1
+        return None
+
+    def put(self, source_hash: str, target_rate: int, fmt: str, mono: bool, data: bytes):
+        path = self.path_for(source_hash, target_rate, fmt, mono)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        tmp_path.write_bytes(data)
+        os.replace(tmp_path, path)
+
+
+def normalize_audio_value(value: Optional[Dict], cache: Optional[AudioCache], target_rate: int, fmt: str, mono: bool) -> Optional[Dict]:
+    """Audio 컬럼 값 {'bytes', 'path'} 1개 변환 (캐시 사용)"""
+    if value is None:
+        return None
+    data = value.get("bytes")
+    if data is None and value.get("path") and os.path.isfile(value["path"]):
+        data = Path(value["path"]).read_bytes()
+    if data is None:
+        return value  # 바이트도 로컬 파일도 없으면 그대로 둠
+
+    source_hash = hashlib.sha256(data).hexdigest()
+    normalized = cache.get(source_hash, target_rate, fmt, mono) if cache else None
+    if normalized is None:
+        normalized = normalize_audio_bytes(data, target_rate, fmt, mono)
+        if cache:
+            cache.put(source_hash, target_rate, fmt, mono, normalized)
+
+    ext = FORMATS[fmt][2]
+    path = value.get("path")
+    path = f"{Path(path).stem}.{ext}" if path else None
+    return {"bytes": normalized, "path": path}
+
+
+def update_features_metadata(schema: pa.Schema, audio_column: str, target_rate: int) -> pa.Schema:
+    """datasets features 메타데이터의 Audio sampling_rate를 목표 레이트로 갱신"""
+    metadata = dict(schema.metadata or {})
+    if b"huggingface" in metadata:
+        info = json.loads(metadata[b"huggingface"])
+        feature = info.get("info", {}).get("features", {}).get(audio_column)
+        if isinstance(feature, dict) and feature.get("_type") == "Audio":
+            feature["sampling_rate"] = target_rate
+        metadata[b"huggingface"] = json.dumps(info).encode("utf-8")
+    return schema.with_metadata(metadata)
+
+
+def normalize_shard(
+    input_path: str,
+    output_path: str,
+    target_rate: int = DEFAULT_RATE,
+    fmt: str = DEFAULT_FORMAT,
+    audio_column: str = DEFAULT_AUDIO_COLUMN,
+    cache_dir: Optional[str] = str(DEFAULT_CACHE_DIR),
+    mono: bool = True
+) -> Dict:
+    """샤드 1개 변환 (프로세스 풀 작업 단위) → 처리 통계 반환
+
+    오디오 컬럼이 없는 샤드는 변환 없이 그대로 복사 (통계의 copied=True)
+    """
+    source = pq.ParquetFile(input_path)
+    Path(output_path).parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = f"{output_path}.tmp"
+
+    if audio_column not in source.schema_arrow.names:
+        shutil.copyfile(input_path, tmp_path)
+        os.replace(tmp_path, output_path)
+        return {
+            "shard": os.path.basename(input_path),
+            "rows": source.metadata.num_rows,
+            "cache_hits": 0,
+            "cache_misses": 0,
+            "copied": True,
+        }
+
+    cache = AudioCache(cache_dir) if cache_dir else None
+    schema = update_features_metadata(source.schema_arrow, audio_column, target_rate)
+    rows = 0
+    with pq.ParquetWriter(tmp_path, schema) as writer:
+        for batch in source.iter_batches(batch_size=ROW_GROUP_ROWS):
+            table = pa.Table.from_batches([batch])
+            values = [
+                normalize_audio_value(value, cache, target_rate, fmt, mono)
+                for value in table.column(audio_column).to_pylist()
+            ]
+            index = table.schema.get_field_index(audio_column)
+            table = table.set_column(index, schema.field(audio_column), pa.array(values, type=schema.field(audio_column).type))
+            writer.write_table(table.replace_schema_metadata(schema.metadata))
+            rows += table.num_rows
+    os.replace(tmp_path, output_path)
+
+    return {
+        "shard": os.path.basename(input_path),
+        "rows": rows,
+        "cache_hits": cache.hits if cache else 0,
+        "cache_misses": cache.misses if cache else rows,
+        "copied": False,
+    }
+
+
+def normalize_folder(
+    input_dir: str,
+    output_dir: str,
+    target_rate: int = DEFAULT_RATE,
+    fmt: str = DEFAULT_FORMAT,
+    audio_column: str = DEFAULT_AUDIO_COLUMN,
+    cache_dir: Optional[str] = str(DEFAULT_CACHE_DIR),
+    workers: int = DEFAULT_WORKERS,
+    mono: bool = True
+):
+    """폴더의 모든 Parquet 샤드를 프로세스 풀에서 변환 (출력 파일명은 입력과 동일, 오디오 컬럼이 없는 샤드는 복사)"""
+    shards = sorted(Path(input_dir).rglob("*.parquet"))
+    if not shards:
+        print(f"❌ Parquet 샤드가 없습니다: {input_dir}")
+        return
+
+    print(f"🎧 {len(shards)}개 샤드 변환 시작 → {target_rate}Hz {fmt} (워커: {workers})")
+    jobs = [
+        (str(shard), str(Path(output_dir) / shard.relative_to(input_dir)))
+        for shard in shards
+    ]
+
+    total_rows = total_hits = copied = 0
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [
+            executor.submit(normalize_shard, input_path, output_path, target_rate, fmt, audio_column, cache_dir, mono)
+            for input_path, output_path in jobs
+        ]
+        for i, future in enumerate(futures, 1):
+            result = future.result()
+            if result["copied"]:
+                copied += 1
+                print(f"  [{i}/{len(jobs)}] {result['shard']}: '{audio_column}' 컬럼 없음 → 그대로 복사")
+                continue
+            total_rows += result["rows"]
+            total_hits += result["cache_hits"]
+            print(f"  [{i}/{len(jobs)}] {result['shard']}: {result['rows']:,}개 (캐시 적중 {result['cache_hits']:,})")
+
+    print(f"✅ 완료: {total_rows:,}개 클립, 캐시 적중 {total_hits:,}개")
+    if copied:
+        print(f"📋 오디오 컬럼이 없어 그대로 복사한 샤드: {copied}개")
+    print(f"📁 저장 위치: {output_dir}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Parquet 음성 샤드 디코딩/리샘플링 전처리")
+    parser.add_argument("--input", "-i", required=True, help="입력 Parquet 샤드 폴더")
+    parser.add_argument("--output", "-o", required=True, help="출력 폴더 (입력과 같은 파일 구조)")
+    parser.add_argument("--rate", type=int, default=DEFAULT_RATE, help=f"목표 샘플링 레이트 (기본: {DEFAULT_RATE})")
+    parser.add_argument("--format", choices=list(FORMATS), default=DEFAULT_FORMAT, help=f"저장 형식 (기본: {DEFAULT_FORMAT})")
+    parser.add_argument("--audio-column", default=DEFAULT_AUDIO_COLUMN, help=f"오디오 컬럼 (기본: {DEFAULT_AUDIO_COLUMN})")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help=f"워커 프로세스 수 (기본: {DEFAULT_WORKERS})")
+    parser.add_argument("--cache-dir", default=str(DEFAULT_CACHE_DIR), help=f"변환 결과 캐시 폴더 (기본: {DEFAULT_CACHE_DIR})")
+    parser.add_argument("--no-cache", action="store_true", help="캐시 사용 안 함")
+    parser.add_argument("--keep-channels", action="store_true", help="모노로 다운믹스하지 않음")
+
+    args = parser.parse_args()
+
+    if Path(args.input).resolve() == Path(args.output).resolve():
+        parser.error("--output은 --input과 다른 폴더여야 합니다.")
+
+    normalize_folder(
+        args.input,
+        args.output,
+        target_rate=args.rate,
+        fmt=args.format,
+        audio_column=args.audio_column,
+        cache_dir=None if args.no_cache else args.cache_dir,
+        workers=args.workers,
+        mono=not args.keep_channels
+    )
+
+
+if __name__ == "__main__":
+    main()
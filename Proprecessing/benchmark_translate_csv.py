@@ -0,0 +1,444 @@
+#!/usr/bin/env python3
+"""
+translate_csv.py 처리량/비용 벤치마크 (로컬 목 LLM 서버 사용, API 비용 없음)
+  사용법:
+
+  python benchmark_translate_csv.py --rows 10000,100000 --latency 0.05 --rate-429 0.01 \
+      --scenario baseline="--no-cache" --scenario pack="--no-cache --pack-tokens 200"
+
+  주요 특징:
+
+  1. 목 서버: OpenAI 호환 /v1/chat/completions (지연, 에러율, 429 주입, 토큰 카운터)
+     JSON 배열 요청(--pack-tokens, --row-pack)은 항목별로 번역해 배열로 응답
+  2. 합성 CSV: caption/caption_sv/caption_multi 컬럼, --duplicate-ratio로 중복 비율 조절
+  3. 측정: CLI를 별도 프로세스로 끝까지 실행하고 rows/sec, requests/sec, 전송 토큰,
+     요청 지연 p50/p99 (HTTP 호출만, 세마포어/스로틀 대기 포함 지연은 별도), 최대 RSS,
+     체크포인트(저널) 오버헤드를 기록
+  4. 결과를 JSON으로 저장해 동시성/묶음/캐시 변경 전후를 리뷰에서 비교
+"""
+
+import os
+import sys
+import csv
+import json
+import time
+import random
+import shlex
+import argparse
+import tempfile
+import threading
+import subprocess
+from pathlib import Path
+from typing import List, Dict, Optional
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+SCRIPT_DIR = Path(__file__).resolve().parent
+DEFAULT_ROWS = "10000,100000,1000000"
+DEFAULT_COLUMNS = "caption,caption_sv,caption_multi"
+DEFAULT_SCENARIOS = {
+    "baseline": "--no-cache --max-workers 32",
+    "pack": "--no-cache --max-workers 32 --pack-tokens 200",
+    "cache": "--max-workers 32",
+}
+DEFAULT_OUTPUT = "bench_results.json"
+WORDS = (
+    "a man woman dog cat riding walking sitting next to red blue green small large "
+    "bicycle street park beach kitchen table holding looking at camera with two people"
+).split()
+
+
+def count_tokens(text: str) -> int:
+    """translate_csv.estimate_tokens와 같은 기준 (UTF-8 4바이트당 1토큰)"""
+    return len(text.encode("utf-8")) // 4 + 1
+
+
+def percentile(values: List[float], q: float) -> Optional[float]:
+    if not values:
+        return None
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * q))]
+
+
+class MockLLMServer:
+    """OpenAI 호환 목 채팅 서버 (별도 스레드에서 실행)"""
+
+    def __init__(
+        self,
+        latency: float = 0.05,
+        jitter: float = 0.5,
+        error_rate: float = 0.0,
+        rate_429: float = 0.0,
+        retry_after: float = 1.0,
+        host: str = "127.0.0.1",
+        port: int = 0
+    ):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.rate_429 = rate_429
+        self.retry_after = retry_after
+        self.lock = threading.Lock()
+        self.reset()
+
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                status, headers, payload = server.handle(self.path, json.loads(body or b"{}"))
+                self.send_response(status)
+                for key, value in headers.items():
+                    self.send_header(key, value)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+        self.httpd = ThreadingHTTPServer((host, port), Handler)
+        self.httpd.daemon_threads = True
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def start(self) -> "MockLLMServer":
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def reset(self):
+        """시나리오마다 카운터 초기화"""
+        with self.lock:
+            self.stats = {
+                "requests": 0,
+                "ok": 0,
+                "errors": 0,
+                "rate_limited": 0,
+                "prompt_tokens": 0,
+                "completion_tokens": 0,
+            }
+
+    def snapshot(self) -> Dict:
+        with self.lock:
+            return dict(self.stats)
+
+    def translate(self, content: str) -> str:
+        """원문 앞에 [ko]를 붙이는 가짜 번역 (JSON 배열 요청은 항목별로)"""
+        try:
+            items = json.loads(content)
+        except json.JSONDecodeError:
+            items = None
+        if isinstance(items, list) and all(isinstance(item, str) for item in items):
+            return json.dumps([f"[ko] {item}" for item in items], ensure_ascii=False)
+        return f"[ko] {content}"
+
+    def handle(self, path: str, request: Dict) -> tuple:
+        """요청 1건 처리 → (상태 코드, 헤더, 본문)"""
+        messages = request.get("messages", [])
+        prompt_tokens = sum(count_tokens(str(message.get("content", ""))) for message in messages)
+        with self.lock:
+            self.stats["requests"] += 1
+            self.stats["prompt_tokens"] += prompt_tokens
+
+        time.sleep(max(0.0, self.latency * (1 + random.uniform(-self.jitter, self.jitter))))
+
+        roll = random.random()
+        if roll < self.rate_429:
+            with self.lock:
+                self.stats["rate_limited"] += 1
+            error = {"error": {"message": "Rate limit reached (mock)", "type": "requests", "code": "rate_limit_exceeded"}}
+            return 429, {"Retry-After": str(self.retry_after)}, json.dumps(error).encode()
+        if roll < self.rate_429 + self.error_rate or not path.endswith("/chat/completions"):
+            with self.lock:
+                self.stats["errors"] += 1
+            error = {"error": {"message": "Internal error (mock)", "type": "server_error"}}
+            return 500, {}, json.dumps(error).encode()
+
+        content = self.translate(str(messages[-1].get("content", ""))) if messages else ""
+        completion_tokens = count_tokens(content)
+        with self.lock:
+            self.stats["ok"] += 1
+            self.stats["completion_tokens"] += completion_tokens
+
+        response = {
+            "id": "chatcmpl-mock",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": request.get("model", "mock"),
+            "choices": [{
+                "index": 0,
+                "finish_reason": "stop",
+                "message": {"role": "assistant", "content": content},
+            }],
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens,
+            },
+        }
+        return 200, {}, json.dumps(response, ensure_ascii=False).encode()
+
+
+def make_caption(rng: random.Random) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(rng.randint(6, 20)))
+
+
+def write_synthetic_csv(path: Path, rows: int, columns: List[str], duplicate_ratio: float = 0.3, seed: int = 0):
+    """합성 캡션 CSV 생성 (duplicate_ratio 비율의 셀은 작은 풀에서 뽑아 중복 발생)"""
+    rng = random.Random(seed)
+    pool = [make_caption(rng) for _ in range(max(1, rows // 100))]
+
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["id"] + columns)
+        for row in range(rows):
+            writer.writerow([row] + [
+                rng.choice(pool) if rng.random() < duplicate_ratio else make_caption(rng)
+                for _ in columns
+            ])
+
+
+def run_child(stats_path: str, cli_args: List[str]):
+    """자식 프로세스: translate_csv를 계측 래퍼와 함께 실행하고 지표를 stats_path에 저장"""
+    sys.path.insert(0, str(SCRIPT_DIR))
+    import translate_csv
+
+    from openai.resources.chat.completions import AsyncCompletions
+
+    latencies = []
+    total_latencies = []
+    journal_seconds = [0.0]
+    limiters = []
+
+    # 요청 지연: HTTP 호출 1번 (세마포어 안에서 호출되므로 대기 시간 제외, 시도마다 기록)
+    create = AsyncCompletions.create
+
+    async def timed_create(self, *args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return await create(self, *args, **kwargs)
+        finally:
+            latencies.append(time.perf_counter() - start)
+
+    AsyncCompletions.create = timed_create
+
+    # 요청 전체 지연 (세마포어/스로틀 대기 + 재시도 포함) - 큐 대기는 이 값과 HTTP 지연의 차이
+    request_translation = translate_csv.request_translation
+
+    async def timed_request_translation(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return await request_translation(*args, **kwargs)
+        finally:
+            total_latencies.append(time.perf_counter() - start)
+
+    translate_csv.request_translation = timed_request_translation
+
+    # 체크포인트(저널) 기록/fsync 시간
+    for name in ("write", "flush", "replay", "reset"):
+        method = getattr(translate_csv.TranslationJournal, name)
+
+        def timed(self, *args, _method=method, **kwargs):
+            start = time.perf_counter()
+            try:
+                return _method(self, *args, **kwargs)
+            finally:
+                journal_seconds[0] += time.perf_counter() - start
+
+        setattr(translate_csv.TranslationJournal, name, timed)
+
+    limiter_init = translate_csv.RateLimiter.__init__
+
+    def capture_limiter(self, *args, **kwargs):
+        limiter_init(self, *args, **kwargs)
+        limiters.append(self)
+
+    translate_csv.RateLimiter.__init__ = capture_limiter
+
+    sys.argv = ["translate_csv.py"] + cli_args
+    start = time.perf_counter()
+    translate_csv.main()
+    wall = time.perf_counter() - start
+
+    with open(stats_path, "w") as f:
+        json.dump({
+            "wall_seconds": wall,
+            "request_latencies": latencies,
+            "request_total_latencies": total_latencies,
+            "journal_seconds": journal_seconds[0],
+            "client_stats": limiters[0].stats if limiters else {},
+        }, f)
+
+
+def run_scenario(
+    server: MockLLMServer,
+    input_file: Path,
+    rows: int,
+    columns: str,
+    name: str,
+    extra_args: str,
+    workdir: Path
+) -> Dict:
+    """시나리오 1개를 새 작업 폴더(체크포인트/캐시 분리)에서 실행하고 지표 반환"""
+    run_dir = workdir / f"{name}_{rows}"
+    run_dir.mkdir(parents=True, exist_ok=True)
+    stats_path = run_dir / "child_stats.json"
+    output_file = run_dir / "output.csv"
+    cli_args = [
+        "--input", str(input_file),
+        "--columns", columns,
+        "--output", str(output_file),
+        "--base-url", server.base_url,
+    ] + shlex.split(extra_args)
+
+    server.reset()
+    env = dict(os.environ, OPENAI_API_KEY=os.getenv("OPENAI_API_KEY", "mock"))
+    start = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, str(Path(__file__).resolve()), "--child", str(stats_path), "--"] + cli_args,
+        cwd=run_dir,
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL
+    )
+    # wait4로 이 자식 프로세스만의 최대 RSS를 얻음 (Linux: KB 단위)
+    _, status, usage = os.wait4(process.pid, 0)
+    process.returncode = os.waitstatus_to_exitcode(status)
+    wall = time.perf_counter() - start
+    server_stats = server.snapshot()
+
+    result = {
+        "scenario": name,
+        "args": extra_args,
+        "rows": rows,
+        "exit_code": process.returncode,
+        "wall_seconds": round(wall, 3),
+        "peak_rss_mb": round(usage.ru_maxrss / 1024, 1),
+        "server": server_stats,
+    }
+    if process.returncode != 0 or not stats_path.exists():
+        print(f"  ❌ {name} ({rows:,}행) 실패: 종료 코드 {process.returncode}")
+        return result
+
+    with open(stats_path) as f:
+        child = json.load(f)
+    latencies = child["request_latencies"]
+    run_seconds = child["wall_seconds"]
+    p50 = percentile(latencies, 0.50)
+    p99 = percentile(latencies, 0.99)
+    total_p50 = percentile(child["request_total_latencies"], 0.50)
+    total_p99 = percentile(child["request_total_latencies"], 0.99)
+    result.update({
+        "rows_per_sec": round(rows / run_seconds, 1),
+        "requests_per_sec": round(server_stats["requests"] / run_seconds, 1),
+        "tokens_sent": server_stats["prompt_tokens"],
+        "tokens_received": server_stats["completion_tokens"],
+        "latency_p50_ms": round(p50 * 1000, 1) if p50 is not None else None,
+        "latency_p99_ms": round(p99 * 1000, 1) if p99 is not None else None,
+        "latency_with_wait_p50_ms": round(total_p50 * 1000, 1) if total_p50 is not None else None,
+        "latency_with_wait_p99_ms": round(total_p99 * 1000, 1) if total_p99 is not None else None,
+        "checkpoint_seconds": round(child["journal_seconds"], 3),
+        "checkpoint_overhead_pct": round(child["journal_seconds"] / run_seconds * 100, 2),
+        "client_stats": child["client_stats"],
+    })
+
+    print(
+        f"  {name} ({rows:,}행): {result['rows_per_sec']:,}행/s, {result['requests_per_sec']:,}요청/s, "
+        f"토큰 {result['tokens_sent']:,}, p50 {result['latency_p50_ms']}ms, p99 {result['latency_p99_ms']}ms "
+        f"(대기 포함 p50 {result['latency_with_wait_p50_ms']}ms), "
+        f"RSS {result['peak_rss_mb']}MB, 체크포인트 {result['checkpoint_overhead_pct']}%"
+    )
+    return result
+
+
+def parse_scenarios(values: Optional[List[str]]) -> Dict[str, str]:
+    """--scenario 이름="translate_csv 인자" 목록 파싱"""
+    if not values:
+        return dict(DEFAULT_SCENARIOS)
+    scenarios = {}
+    for value in values:
+        name, _, extra_args = value.partition("=")
+        scenarios[name.strip()] = extra_args.strip()
+    return scenarios
+
+
+def main():
+    if len(sys.argv) > 2 and sys.argv[1] == "--child":
+        # 자식 프로세스 모드: --child <stats_path> -- <translate_csv 인자...>
+        run_child(sys.argv[2], sys.argv[4:])
+        return
+
+    parser = argparse.ArgumentParser(description="translate_csv.py 처리량/비용 벤치마크 (로컬 목 LLM 서버)")
+    parser.add_argument("--rows", default=DEFAULT_ROWS, help=f"합성 CSV 행 수 (쉼표로 구분, 기본: {DEFAULT_ROWS})")
+    parser.add_argument("--columns", default=DEFAULT_COLUMNS, help=f"번역할 컬럼 (기본: {DEFAULT_COLUMNS})")
+    parser.add_argument("--scenario", action="append", help='시나리오 이름="translate_csv 추가 인자" (여러 번 지정 가능, 기본: baseline/pack/cache)')
+    parser.add_argument("--duplicate-ratio", type=float, default=0.3, help="중복 셀 비율 (기본: 0.3)")
+    parser.add_argument("--latency", type=float, default=0.05, help="목 서버 평균 응답 지연(초) (기본: 0.05)")
+    parser.add_argument("--jitter", type=float, default=0.5, help="지연 변동 비율 (기본: 0.5 = ±50%%)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="500 에러 비율 (기본: 0)")
+    parser.add_argument("--rate-429", type=float, default=0.0, help="429 응답 비율 (기본: 0)")
+    parser.add_argument("--retry-after", type=float, default=1.0, help="429 응답의 Retry-After(초) (기본: 1)")
+    parser.add_argument("--workdir", help="합성 데이터/실행 폴더 (기본: 임시 폴더)")
+    parser.add_argument("--output", "-o", default=DEFAULT_OUTPUT, help=f"결과 JSON 경로 (기본: {DEFAULT_OUTPUT})")
+
+    args = parser.parse_args()
+
+    rows_list = [int(rows) for rows in args.rows.split(",")]
+    columns = [col.strip() for col in args.columns.split(",")]
+    scenarios = parse_scenarios(args.scenario)
+    workdir = Path(args.workdir or tempfile.mkdtemp(prefix="translate_bench_"))
+    workdir.mkdir(parents=True, exist_ok=True)
+
+    server = MockLLMServer(
+        latency=args.latency,
+        jitter=args.jitter,
+        error_rate=args.error_rate,
+        rate_429=args.rate_429,
+        retry_after=args.retry_after
+    ).start()
+    print(f"목 서버 시작: {server.base_url}")
+    print(f"작업 폴더: {workdir}")
+
+    results = []
+    try:
+        for rows in rows_list:
+            input_file = workdir / f"synthetic_{rows}.csv"
+            if not input_file.exists():
+                print(f"\n합성 CSV 생성: {rows:,}행")
+                write_synthetic_csv(input_file, rows, columns, args.duplicate_ratio)
+            print(f"\n📊 {rows:,}행 벤치마크")
+            for name, extra_args in scenarios.items():
+                results.append(run_scenario(server, input_file, rows, ",".join(columns), name, extra_args, workdir))
+    finally:
+        server.stop()
+
+    report = {
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "config": {
+            "columns": columns,
+            "duplicate_ratio": args.duplicate_ratio,
+            "latency": args.latency,
+            "jitter": args.jitter,
+            "error_rate": args.error_rate,
+            "rate_429": args.rate_429,
+            "retry_after": args.retry_after,
+        },
+        "results": results,
+    }
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"\n결과 저장: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
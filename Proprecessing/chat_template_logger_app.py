@@ -2,6 +2,91 @@ import streamlit as st
 import json
 from datetime import datetime
 import os
+import atexit
+import threading
+
+LOG_DIR = '.'
+FILE_PREFIX = "chat_data_"
+FLUSH_INTERVAL = 5.0  # seconds between background flushes
+MAX_BUFFERED = 100  # flush immediately once this many records are pending
+PAGE_SIZE = 20  # records shown per page in the viewer
+READ_BLOCK = 64 * 1024  # bytes read per step when scanning a file backwards
+
+
+def log_filename(now=None):
+    """Daily rotation: one append-only .jsonl file per day"""
+    now = now or datetime.now()
+    return os.path.join(LOG_DIR, f"{FILE_PREFIX}{now.strftime('%Y%m%d')}.jsonl")
+
+
+class JsonlWriter:
+    """Buffered append-only JSONL writer shared by every session
+
+    Records are kept in memory and appended (one JSON object per line) by a background
+    thread every FLUSH_INTERVAL seconds, or as soon as MAX_BUFFERED records are pending.
+    Each flush ends with fsync so a flushed record survives a crash.
+    """
+
+    def __init__(self, flush_interval=FLUSH_INTERVAL, max_buffered=MAX_BUFFERED):
+        self.flush_interval = flush_interval
+        self.max_buffered = max_buffered
+        self.buffer = []  # [(filename, line), ...]
+        self.lock = threading.Lock()
+        self.file = None
+        self.stop = threading.Event()
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+        atexit.register(self.close)
+
+    def write(self, record):
+        line = json.dumps(record, ensure_ascii=False) + "\n"
+        filename = log_filename()
+        with self.lock:
+            self.buffer.append((filename, line))
+            if len(self.buffer) >= self.max_buffered:
+                self._flush_locked()
+        return filename
+
+    def pending(self):
+        with self.lock:
+            return len(self.buffer)
+
+    def flush(self):
+        with self.lock:
+            self._flush_locked()
+
+    def _flush_locked(self):
+        if not self.buffer:
+            return
+        for filename, line in self.buffer:
+            if self.file is None or self.file.name != filename:
+                self._close_file()  # day changed: rotate to the new file
+                self.file = open(filename, 'a', encoding='utf-8')
+            self.file.write(line)
+        self.buffer = []
+        self.file.flush()
+        os.fsync(self.file.fileno())
+
+    def _close_file(self):
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+    def _run(self):
+        while not self.stop.wait(self.flush_interval):
+            self.flush()
+
+    def close(self):
+        self.stop.set()
+        with self.lock:
+            self._flush_locked()
+            self._close_file()
+
+
+@st.cache_resource
+def get_writer():
+    return JsonlWriter()
+
 
 def save_to_json(human_input, ai_output):
     data = {
@@ -11,17 +96,34 @@ def save_to_json(human_input, ai_output):
         ]
     }
     
-    filename = f"chat_data_{datetime.now().strftime('%Y%m%d')}.jsonl"
-    
-    with open(filename, 'w', encoding='utf-8') as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
-    
-    return filename
+    return get_writer().write(data)
+
+
+def read_jsonl_tail(filename, limit=PAGE_SIZE, skip=0):
+    """Read only the last skip+limit lines by scanning the file backwards in blocks
 
-def read_json_file(filename):
-    with open(filename, 'r', encoding='utf-8') as f:
-        data = json.load(f)
-    return data
+    Returns (records newest first, has_more). A trailing partial line is ignored.
+    The cost depends on how deep the page is, not on the size of the file.
+    """
+    wanted = skip + limit + 1  # one extra line tells whether an older page exists
+    with open(filename, 'rb') as f:
+        position = f.seek(0, os.SEEK_END)
+        data = b""
+        while position > 0 and data.count(b"\n") <= wanted:
+            step = min(READ_BLOCK, position)
+            position -= step
+            f.seek(position)
+            data = f.read(step) + data
+
+    lines = data.split(b"\n")
+    lines.pop()  # text after the last newline (empty, or a line still being written)
+    if position > 0:
+        lines = lines[1:]  # first line may be cut by the block boundary
+    lines = [line for line in lines if line.strip()]
+    lines.reverse()
+
+    records = [json.loads(line) for line in lines[skip:skip + limit]]
+    return records, len(lines) > skip + limit
 
 st.title("ChatTemplate Input/Output App")
 
@@ -58,9 +160,22 @@ if st.session_state.saved_message:
     st.session_state.saved_message = ""
 
 st.header("Saved Data")
-json_files = [f for f in os.listdir('.') if f.endswith('.json')]
-selected_file = st.selectbox("Select a file to view", json_files)
+pending = get_writer().pending()
+if pending:
+    st.caption(f"{pending} record(s) waiting to be flushed (every {FLUSH_INTERVAL:.0f}s)")
+
+jsonl_files = sorted(
+    (f for f in os.listdir(LOG_DIR) if f.startswith(FILE_PREFIX) and f.endswith('.jsonl')),
+    reverse=True
+)
+selected_file = st.selectbox("Select a file to view", jsonl_files)
 
 if selected_file:
-    data = read_json_file(selected_file)
-    st.json(data)
\ No newline at end of file
+    page = st.number_input("Page (1 = newest)", min_value=1, value=1, step=1)
+    records, has_more = read_jsonl_tail(os.path.join(LOG_DIR, selected_file), PAGE_SIZE, (page - 1) * PAGE_SIZE)
+    if not records:
+        st.info("No records on this page.")
+    for record in records:
+        st.json(record)
+    if has_more:
+        st.caption("Older records are on the next page.")
@@ -1,44 +1,432 @@
 import os
+import csv
+import json
+import hashlib
 import tarfile
-import numpy as np
+import argparse
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
 import pandas as pd
-from sklearn.model_selection import train_test_split
-from datasets import Dataset, DatasetDict, Audio
+import pyarrow as pa
+import pyarrow.parquet as pq
+from datasets import Dataset, DatasetDict, Audio, Features, Value
+from huggingface_hub import HfApi, CommitOperationAdd, CommitOperationDelete
 
 # 1. 압축 해제 (이미 했다면 스킵)
 # with tarfile.open('cv-corpus-22.0-2025-06-25-ko.tar.gz', 'r:gz') as tar:
 #     tar.extractall(path='./cv_ko_22')
 
 # 2. 경로 설정
-base_path = './ko'
-
-# 모든 TSV 파일 로드
-dfs = {
-    'train': pd.read_csv(f'{base_path}/train.tsv', sep='\t'),
-    'validation': pd.read_csv(f'{base_path}/dev.tsv', sep='\t'),
-    'test': pd.read_csv(f'{base_path}/test.tsv', sep='\t'),
-    'validated': pd.read_csv(f'{base_path}/validated.tsv', sep='\t')  # 추가!
+BASE_PATH = './ko'
+REPO_ID = "daje/common-voice-ko-22"  # 원하는 이름으로 변경
+SAMPLING_RATE = 16000
+TSV_CHUNK_ROWS = 50_000  # TSV를 한 번에 읽는 행 수 (메모리 상한)
+
+# split 이름 → TSV 파일 (validated는 train/dev/test와 겹침)
+SPLIT_FILES = {
+    'train': 'train.tsv',
+    'validation': 'dev.tsv',
+    'test': 'test.tsv',
+    'validated': 'validated.tsv',  # 추가!
 }
+INT_COLUMNS = ['up_votes', 'down_votes']
+CLIPS_CONFIG = "clips"  # 음성 바이트는 이 config에 클립당 1번만 저장 ('path'로 참조)
+
+# 로컬 Parquet 샤드 export / 업로드 설정
+EXPORT_DIR = './cv_ko_22_parquet'
+DEFAULT_WORKERS = os.cpu_count() or 4
+MAX_SHARD_BYTES = 500 * 1024 * 1024  # clips 샤드 1개의 최대 음성 바이트
+ROW_GROUP_BYTES = 64 * 1024 * 1024  # 워커가 메모리에 모으는 최대 음성 바이트 (row group 단위)
+METADATA_SHARD_ROWS = 1_000_000  # split 메타데이터 Parquet 파일 1개의 최대 행 수
+FILES_PER_COMMIT = 50  # 업로드 커밋 1개에 담는 파일 수 (중단 시 이 단위로 이어서 올림)
+EXPORT_MANIFEST = "export_manifest.json"  # export 폴더 안: 입력 시그니처와 완료된 샤드 기록
+
+
+def split_tsv_paths(base_path=BASE_PATH):
+    """split 이름 → TSV 경로"""
+    return {split: f"{base_path}/{name}" for split, name in SPLIT_FILES.items()}
+
+
+def read_tsv_chunks(tsv_path, usecols=None):
+    """Common Voice TSV를 TSV_CHUNK_ROWS 단위로 읽기 (빈 값은 None)"""
+    reader = pd.read_csv(
+        tsv_path,
+        sep='\t',
+        quoting=csv.QUOTE_NONE,  # 문장 안의 따옴표를 그대로 유지
+        usecols=usecols,
+        dtype={col: 'Int64' for col in INT_COLUMNS},
+        chunksize=TSV_CHUNK_ROWS,
+    )
+    for chunk in reader:
+        yield chunk.astype(object).where(chunk.notna(), None)
+
+
+def tsv_features(tsv_path):
+    """TSV 헤더로 features 생성 (투표 수는 int64, 나머지는 문자열)"""
+    columns = pd.read_csv(tsv_path, sep='\t', quoting=csv.QUOTE_NONE, nrows=0).columns
+    return Features({
+        col: Value('int64') if col in INT_COLUMNS else Value('string')
+        for col in columns
+    })
+
+
+def generate_split_rows(tsv_path):
+    """split의 메타데이터 행을 스트리밍 (음성은 'path'로 clips config 참조)"""
+    for chunk in read_tsv_chunks(tsv_path):
+        yield from chunk.to_dict('records')
+
+
+def generate_clips(tsv_paths, clips_dir):
+    """모든 split에서 쓰는 클립을 한 번씩만 생성 {'path', 'audio'}"""
+    seen = set()
+    for tsv_path in tsv_paths:
+        for chunk in read_tsv_chunks(tsv_path, usecols=['path']):
+            paths = chunk['path'].dropna().drop_duplicates()
+            paths = paths[~paths.isin(seen)]
+            seen.update(paths)
+            audio = clips_dir + '/' + paths  # 벡터화된 경로 생성
+            for path, audio_path in zip(paths, audio):
+                yield {'path': path, 'audio': audio_path}
+
+
+def clips_features(sampling_rate=SAMPLING_RATE):
+    """clips config features (음성 바이트는 Audio 컬럼에 포함)"""
+    return Features({'path': Value('string'), 'audio': Audio(sampling_rate=sampling_rate)})
+
+
+def build_datasets(base_path=BASE_PATH, sampling_rate=SAMPLING_RATE):
+    """split 메타데이터 DatasetDict와 중복 제거된 clips Dataset 생성
+
+    from_generator가 행을 Arrow 캐시에 배치 단위로 기록하므로 TSV 전체를 메모리에 올리지 않음
+    캐시 키가 gen_kwargs(경로)만으로는 같은 경로에 풀린 새 릴리스를 구분하지 못하므로
+    TSV 크기/수정 시각 서명으로 fingerprint를 지정
+    """
+    tsv_paths = split_tsv_paths(base_path)
+    signatures = {split: tsv_signature(tsv_path) for split, tsv_path in tsv_paths.items()}
+
+    splits = {
+        split: Dataset.from_generator(
+            generate_split_rows,
+            gen_kwargs={'tsv_path': tsv_path},
+            features=tsv_features(tsv_path),
+            fingerprint=file_signature(split, signatures[split]),
+        )
+        for split, tsv_path in tsv_paths.items()
+    }
+
+    clips = Dataset.from_generator(
+        generate_clips,
+        gen_kwargs={'tsv_paths': tuple(tsv_paths.values()), 'clips_dir': f"{base_path}/clips"},
+        features=clips_features(sampling_rate),
+        fingerprint=file_signature(CLIPS_CONFIG, os.path.abspath(f"{base_path}/clips"), sampling_rate, sorted(signatures.items())),
+    )
+    return DatasetDict(splits), clips
+
+
+def file_signature(*parts):
+    """입력 식별 해시 (경로/크기/수정 시각 등)"""
+    return hashlib.sha256(json.dumps(parts, ensure_ascii=False).encode("utf-8")).hexdigest()
+
+
+def tsv_signature(tsv_path):
+    stat = os.stat(tsv_path)
+    return file_signature(os.path.abspath(tsv_path), stat.st_size, stat.st_mtime_ns)
+
+
+def clip_shard_signature(clips, sampling_rate):
+    """clips 샤드 식별 해시 (클립 목록 + 각 음성 파일의 절대 경로/크기/수정 시각 + 샘플링 레이트)"""
+    return file_signature(sampling_rate, [[path, os.path.abspath(audio_path), size, mtime_ns] for path, audio_path, size, mtime_ns in clips])
+
+
+def load_export_manifest(output_dir, settings):
+    """export 매니페스트 로드 - base_path/샤드 크기/샘플링 레이트가 다르면 새로 시작"""
+    path = Path(output_dir) / EXPORT_MANIFEST
+    if path.exists():
+        with open(path, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+        if manifest.get('settings') == settings:
+            return manifest
+        print(f"⚠️ export 설정/입력 폴더가 바뀌어 모든 샤드를 다시 기록: {path}")
+    return {'settings': settings, 'splits': {}, 'clips': {}}
+
+
+def save_export_manifest(output_dir, manifest):
+    """임시 파일에 쓴 뒤 교체 (쓰는 도중 중단돼도 이전 매니페스트 유지)"""
+    path = Path(output_dir) / EXPORT_MANIFEST
+    tmp_path = path.with_name(f"{path.name}.tmp")
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, path)
+
+
+def plan_clip_shards(tsv_paths, clips_dir, max_shard_bytes=MAX_SHARD_BYTES):
+    """고유 클립을 파일 크기 기준으로 max_shard_bytes 이하 샤드로 나눔
+
+    같은 입력이면 항상 같은 샤드 구성이 나오므로 export를 중단 후 다시 실행해도 샤드 이름이 유지됨
+    반환: [[(path, 음성 파일 경로, 크기, 수정 시각 ns), ...], ...]
+    """
+    shards, current, current_bytes = [], [], 0
+    for clip in generate_clips(tsv_paths, clips_dir):
+        stat = os.stat(clip['audio'])
+        if current and current_bytes + stat.st_size > max_shard_bytes:
+            shards.append(current)
+            current, current_bytes = [], 0
+        current.append((clip['path'], clip['audio'], stat.st_size, stat.st_mtime_ns))
+        current_bytes += stat.st_size
+    if current:
+        shards.append(current)
+    return shards
+
+
+def export_metadata_split(tsv_path, output_dir, split):
+    """split 메타데이터를 data/{split}-{순번:05d}.parquet로 기록 (프로세스 풀 작업 단위)
+
+    모든 파일을 다 쓴 뒤에 이름을 바꿈 (완료 기록은 호출한 쪽의 export 매니페스트)
+    """
+    data_dir = Path(output_dir) / "data"
+    schema = tsv_features(tsv_path).arrow_schema
+    for old_file in data_dir.glob(f"{split}-*.parquet"):
+        old_file.unlink()  # 이전 실행의 파일이 섞이지 않게
+
+    tmp_files = []
+    writer, rows = None, 0
+    for chunk in read_tsv_chunks(tsv_path):
+        if writer is None or rows >= METADATA_SHARD_ROWS:
+            if writer is not None:
+                writer.close()
+            tmp_files.append(data_dir / f"{split}-{len(tmp_files):05d}.parquet.tmp")
+            writer, rows = pq.ParquetWriter(tmp_files[-1], schema), 0
+        writer.write_table(pa.Table.from_pylist(chunk.to_dict('records'), schema=schema))
+        rows += len(chunk)
+    if writer is not None:
+        writer.close()
+
+    files = []
+    for tmp_file in tmp_files:
+        final_file = tmp_file.with_suffix("")
+        os.replace(tmp_file, final_file)
+        files.append(str(final_file))
+    return files
+
+
+def export_clip_shard(shard_index, num_shards, clips, output_dir, sampling_rate=SAMPLING_RATE):
+    """clips 샤드 1개를 음성 바이트까지 포함해 기록 (프로세스 풀 작업 단위)
+
+    파일: {output_dir}/clips/train-{샤드:05d}-of-{샤드 수:05d}.parquet (임시 파일에 쓰고 교체)
+    """
+    schema = clips_features(sampling_rate).arrow_schema
+    path = Path(output_dir) / "clips" / f"train-{shard_index:05d}-of-{num_shards:05d}.parquet"
+    tmp_path = path.with_name(f"{path.name}.tmp")
+    buffer, buffer_bytes = [], 0
+
+    with pq.ParquetWriter(tmp_path, schema) as writer:
+        for clip_path, audio_path, _, _ in clips:
+            audio_bytes = Path(audio_path).read_bytes()
+            buffer.append({'path': clip_path, 'audio': {'bytes': audio_bytes, 'path': clip_path}})
+            buffer_bytes += len(audio_bytes)
+            if buffer_bytes >= ROW_GROUP_BYTES:
+                writer.write_table(pa.Table.from_pylist(buffer, schema=schema))
+                buffer, buffer_bytes = [], 0
+        if buffer:
+            writer.write_table(pa.Table.from_pylist(buffer, schema=schema))
+    os.replace(tmp_path, path)
+    return str(path)
+
+
+def write_dataset_card(output_dir, repo_id=REPO_ID):
+    """README(데이터셋 카드)에 split별 data_files와 clips config 기록"""
+    data_files = "\n".join(
+        f"  - split: {split}\n    path: data/{split}-*" for split in SPLIT_FILES
+    )
+    card = (
+        "---\n"
+        "configs:\n"
+        "- config_name: default\n"
+        f"  data_files:\n{data_files}\n"
+        f"- config_name: {CLIPS_CONFIG}\n"
+        "  data_files:\n"
+        "  - split: train\n"
+        f"    path: {CLIPS_CONFIG}/train-*\n"
+        "---\n\n"
+        f"# {repo_id}\n\n"
+        "Common Voice 22.0 한국어. 음성은 clips config에 클립당 한 번만 저장되고, "
+        "각 split은 'path'로 참조합니다.\n"
+    )
+    (Path(output_dir) / "README.md").write_text(card, encoding="utf-8")
+
+
+def export_dataset(base_path=BASE_PATH, output_dir=EXPORT_DIR, workers=DEFAULT_WORKERS, sampling_rate=SAMPLING_RATE, repo_id=REPO_ID, max_shard_bytes=MAX_SHARD_BYTES):
+    """split 메타데이터와 clips 샤드를 워커 프로세스에서 병렬로 로컬 Parquet로 export
+
+    export 매니페스트에 같은 입력 시그니처(TSV 크기/수정 시각, 샤드의 클립 목록/음성 파일)로
+    완료 기록이 있는 샤드만 건너뛰므로, 중단 후 다시 실행하면 남은 샤드만 기록하고
+    입력이 바뀐 샤드는 다시 기록
+    """
+    tsv_paths = split_tsv_paths(base_path)
+    data_dir = Path(output_dir) / "data"
+    clips_dir = Path(output_dir) / CLIPS_CONFIG
+    data_dir.mkdir(parents=True, exist_ok=True)
+    clips_dir.mkdir(parents=True, exist_ok=True)
+
+    manifest = load_export_manifest(output_dir, {
+        'base_path': os.path.abspath(base_path),
+        'max_shard_bytes': max_shard_bytes,
+        'sampling_rate': sampling_rate,
+    })
+
+    shards = plan_clip_shards(tuple(tsv_paths.values()), f"{base_path}/clips", max_shard_bytes)
+    num_shards = len(shards)
+    shard_names = {f"train-{i:05d}-of-{num_shards:05d}.parquet" for i in range(num_shards)}
+    for old_file in clips_dir.glob("train-*.parquet"):
+        if old_file.name not in shard_names:
+            old_file.unlink()  # 샤드 수가 달랐던 이전 실행의 파일
+    print(f"🎧 고유 클립 {sum(len(shard) for shard in shards):,}개 → clips 샤드 {num_shards}개")
+
+    manifest['clips'] = {name: signature for name, signature in manifest['clips'].items() if name in shard_names}
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {}
+        for split, tsv_path in tsv_paths.items():
+            signature = tsv_signature(tsv_path)
+            done = manifest['splits'].get(split)
+            if done and done['signature'] == signature and all((data_dir / file).exists() for file in done['files']):
+                print(f"  ⏭️ {split}: 이미 export됨")
+                continue
+            manifest['splits'].pop(split, None)
+            futures[executor.submit(export_metadata_split, tsv_path, output_dir, split)] = ('splits', split, signature)
+        for index, clips in enumerate(shards):
+            name = f"train-{index:05d}-of-{num_shards:05d}.parquet"
+            signature = clip_shard_signature(clips, sampling_rate)
+            if manifest['clips'].get(name) == signature and (clips_dir / name).exists():
+                continue
+            manifest['clips'].pop(name, None)
+            futures[executor.submit(export_clip_shard, index, num_shards, clips, output_dir, sampling_rate)] = ('clips', name, signature)
+        save_export_manifest(output_dir, manifest)
+
+        skipped = num_shards - sum(kind == 'clips' for kind, _, _ in futures.values())
+        if skipped:
+            print(f"  ⏭️ clips: 샤드 {skipped}개 이미 export됨")
+        for future, (kind, name, signature) in futures.items():
+            result = future.result()
+            if kind == 'splits':
+                manifest['splits'][name] = {'signature': signature, 'files': [Path(file).name for file in result]}
+                print(f"  ✅ {name}: {len(result)}개 파일")
+            else:
+                manifest['clips'][name] = signature
+                print(f"  ✅ clips {name}")
+            save_export_manifest(output_dir, manifest)
+
+    write_dataset_card(output_dir, repo_id)
+    print(f"📁 export 완료: {output_dir}")
+
+
+def upload_export(output_dir=EXPORT_DIR, repo_id=REPO_ID, api=None, files_per_commit=FILES_PER_COMMIT):
+    """export 폴더를 허브에 커밋 (README는 마지막)
+
+    허브에 같은 내용(LFS sha256)으로 이미 있는 샤드는 건너뛰므로 중단 후 다시 실행하면 남은 것만 올림
+    api에 HfApi 호환 객체를 넘기면 로컬 허브 대역으로도 실행 가능
+    """
+    api = api or HfApi()
+    api.create_repo(repo_id, repo_type="dataset", private=True, exist_ok=True)
+
+    root = Path(output_dir)
+    local_files = {
+        file.relative_to(root).as_posix(): file
+        for folder in ("data", CLIPS_CONFIG)
+        for file in sorted((root / folder).glob("*.parquet"))
+    }
+    paths = list(local_files)
+
+    remote_hashes = {}
+    for i in range(0, len(paths), files_per_commit):
+        for info in api.get_paths_info(repo_id, paths[i:i + files_per_commit], repo_type="dataset"):
+            if getattr(info, "lfs", None) is not None:
+                remote_hashes[info.path] = info.lfs.sha256
+
+    pending = []
+    for path, file in local_files.items():
+        sha256 = hashlib.sha256()
+        with open(file, "rb") as f:
+            for block in iter(lambda: f.read(1024 * 1024), b""):
+                sha256.update(block)
+        if remote_hashes.get(path) != sha256.hexdigest():
+            pending.append(path)
+    print(f"☁️ 업로드 대상: {len(pending)}/{len(local_files)}개 파일")
+
+    for i in range(0, len(pending), files_per_commit):
+        batch = pending[i:i + files_per_commit]
+        api.create_commit(
+            repo_id=repo_id,
+            repo_type="dataset",
+            operations=[CommitOperationAdd(path_in_repo=path, path_or_fileobj=str(local_files[path])) for path in batch],
+            commit_message=f"Add shards {i + 1}-{i + len(batch)}/{len(pending)}"
+        )
+        print(f"  ✅ {i + len(batch)}/{len(pending)}개 커밋")
+
+    # 이전 export에만 있던 허브 샤드 삭제 + 데이터셋 카드 갱신
+    stale = [
+        path for path in api.list_repo_files(repo_id, repo_type="dataset")
+        if path.endswith(".parquet") and path.split("/")[0] in ("data", CLIPS_CONFIG) and path not in local_files
+    ]
+    api.create_commit(
+        repo_id=repo_id,
+        repo_type="dataset",
+        operations=[CommitOperationDelete(path_in_repo=path) for path in stale]
+        + [CommitOperationAdd(path_in_repo="README.md", path_or_fileobj=str(root / "README.md"))],
+        commit_message="Update dataset card"
+    )
+    if stale:
+        print(f"  🧹 이전 샤드 {len(stale)}개 삭제")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Common Voice 한국어 데이터셋 생성 및 업로드")
+    parser.add_argument("--base-path", default=BASE_PATH, help=f"압축 해제한 언어 폴더 (기본: {BASE_PATH})")
+    parser.add_argument("--repo-id", default=REPO_ID, help=f"업로드할 데이터셋 저장소 (기본: {REPO_ID})")
+    parser.add_argument("--sampling-rate", type=int, default=SAMPLING_RATE, help=f"Audio 샘플링 레이트 (기본: {SAMPLING_RATE})")
+    parser.add_argument("--output", default=EXPORT_DIR, help=f"export 폴더 (기본: {EXPORT_DIR})")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help=f"export 워커 프로세스 수 (기본: {DEFAULT_WORKERS})")
+    parser.add_argument("--max-shard-mb", type=int, default=MAX_SHARD_BYTES // (1024 * 1024), help="clips 샤드 1개의 최대 크기 MB (기본: %(default)s)")
+    parser.add_argument("--endpoint", default=None, help="허브 주소 (로컬 허브로 테스트할 때)")
+    parser.add_argument(
+        "command", nargs="?", default="push", choices=["push", "export", "upload"],
+        help="push: datasets로 바로 업로드 (기본) / export: 로컬 Parquet 샤드 생성 / upload: export 폴더 커밋"
+    )
+    args = parser.parse_args()
+
+    token = os.environ.get("HF_TOKEN")
+
+    if args.command == "export":
+        export_dataset(args.base_path, args.output, args.workers, args.sampling_rate, args.repo_id, args.max_shard_mb * 1024 * 1024)
+        return
+    if args.command == "upload":
+        upload_export(args.output, args.repo_id, HfApi(endpoint=args.endpoint, token=token))
+        print("업로드 완료!")
+        return
 
-print("데이터셋 크기:")
-for name, df in dfs.items():
-    print(f"{name}: {len(df)} 샘플")
+    dataset, clips = build_datasets(args.base_path, args.sampling_rate)
 
-# Audio 경로 추가 및 Dataset 변환
-datasets = {}
-for split, df in dfs.items():
-    df['audio'] = df['path'].apply(lambda x: f"{base_path}/clips/{x}")
-    datasets[split] = Dataset.from_pandas(df, preserve_index=False)
+    print("데이터셋 크기:")
+    for name, split in dataset.items():
+        print(f"{name}: {len(split)} 샘플")
+    print(f"고유 클립: {len(clips)}개 (split 합계 {sum(len(split) for split in dataset.values())}행)")
 
-# DatasetDict 생성 및 Audio feature 추가
-dataset = DatasetDict(datasets)
-dataset = dataset.cast_column("audio", Audio(sampling_rate=16000))
+    # split은 메타데이터만, 음성은 clips config에 한 번만 저장
+    dataset.push_to_hub(
+        args.repo_id,
+        private=True,  # 비공개로 시작
+        token=token
+    )
+    clips.push_to_hub(
+        args.repo_id,
+        config_name=CLIPS_CONFIG,
+        split="train",
+        private=True,
+        token=token
+    )
 
+    print("업로드 완료!")
 
-dataset.push_to_hub(
-    "daje/common-voice-ko-22",  # 원하는 이름으로 변경
-    private=True,  # 비공개로 시작
-    token=""
-)
 
-print("업로드 완료!")
\ No newline at end of file
+if __name__ == "__main__":
+    main()
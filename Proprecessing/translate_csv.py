@@ -1,7 +1,7 @@
 #!/usr/bin/env python3
 """
 CSV 파일의 지정된 컬럼을 한국어로 번역하는 스크립트
-OpenAI API와 pqdm을 사용하여 대용량 파일을 안전하게 처리
+OpenAI API(비동기 클라이언트)를 사용하여 대용량 파일을 안전하게 처리
   사용법:
 
   python translate_csv.py --input sampled_for_translation_korean.csv --columns "caption,caption_sv,caption_multi"
@@ -9,21 +9,36 @@ OpenAI API와 pqdm을 사용하여 대용량 파일을 안전하게 처리
   주요 특징:
 
   1. 간단한 CLI: 파일명과 컬럼을 파라미터로 받음
-  2. 안전한 처리: 5,000개마다 자동 저장, 중단 시 재시작 가능
-  3. 병렬 처리: pqdm으로 효율적 번역
-  4. 에러 처리: API 실패 시 3회 재시도
+  2. 안전한 처리: 번역 결과를 추가 전용 저널에 기록 (1,000행 또는 10초마다 fsync),
+     중단 시 저널을 재생해 재시작하고 최종 결과는 한 번만 저장
+     (--stream: 청크 단위로 읽고 결과를 이어써서 메모리 사용량 일정, 작은 매니페스트로 재시작)
+  3. 병렬 처리: asyncio + 세마포어로 동시 요청 수를 --max-workers개로 제한
+     모든 컬럼의 (행, 컬럼) 셀을 하나의 작업 큐로 스케줄링 (--row-pack: 짧은 행은 한 요청으로)
+     (--base-url로 로컬 목 서버/호환 서버 지정 가능)
+  4. 묶음 번역: --pack-tokens N이면 짧은 행 여러 개를 JSON 배열 하나로 번역
+     (응답 개수/형식이 어긋나면 묶음을 반으로 나눠 재시도)
+  5. 캐시: 같은 원문은 한 번만 요청하고, 결과는 SQLite 캐시에 저장해 파일/재실행 간 재사용
+  6. Batch API: --batch-api면 요청을 JSONL 배치로 제출하고 폴링 후 custom_id로 병합
+  7. 백엔드: --backend openai(OpenAI 호환 서버) 또는 hf(로컬 seq2seq 모델, 길이순 동적 배칭)
+  8. 에러 처리: --rpm/--tpm 토큰 버킷으로 요청 속도 조절, 429 시 Retry-After와
+     지터 백오프로 최대 6회 재시도 (끝내 실패한 행은 비워 두어 재실행 시 다시 번역)
 """
 
 import os
 import json
 import time
+import sqlite3
+import hashlib
+import random
+import asyncio
 import argparse
 from pathlib import Path
-from typing import List, Dict, Optional
+from collections import defaultdict, deque
+from typing import Callable, List, Dict, Iterator, Optional, Protocol
 
 import pandas as pd
-from openai import OpenAI
-from pqdm.processes import pqdm
+from openai import AsyncOpenAI, OpenAI, RateLimitError
+from tqdm import tqdm
 from dotenv import load_dotenv
 
 # 환경 변수 로드
@@ -31,171 +46,1279 @@ load_dotenv()
 
 # 설정
 CHECKPOINT_DIR = Path("checkpoints")
+DEFAULT_CACHE_PATH = Path("translation_cache") / "translations.sqlite"
+DEFAULT_CACHE_SIZE = 1_000_000  # 캐시 최대 항목 수 (초과 시 오래 안 쓴 항목부터 삭제)
+MODEL = "gpt-4.1"
+DEFAULT_HF_MODEL = "facebook/nllb-200-distilled-600M"
+DEFAULT_HF_SRC_LANG = "eng_Latn"
+DEFAULT_HF_TGT_LANG = "kor_Hang"
+DEFAULT_HF_BATCH_SIZE = 32
+HF_BATCH_WAIT_SECONDS = 0.05  # 동적 배칭: 첫 텍스트가 들어온 뒤 더 모으는 시간
+HF_BATCHES_PER_WINDOW = 8  # 한 번에 모아 길이순으로 정렬하는 최대 배치 수
 DEFAULT_CHUNK_SIZE = 1000
-DEFAULT_CHECKPOINT_INTERVAL = 5000
+DEFAULT_CHECKPOINT_INTERVAL = 1000  # 저널 fsync 간격 (행)
+DEFAULT_CHECKPOINT_SECONDS = 10  # 저널 fsync 간격 (초)
+DEFAULT_STREAM_CHUNK_SIZE = 50_000  # 스트리밍 모드에서 한 번에 읽고 쓰는 행 수
 DEFAULT_MAX_WORKERS = 5
-MAX_RETRIES = 3
+DEFAULT_RPM = 0  # 0이면 제한 없음
+DEFAULT_TPM = 0  # 0이면 제한 없음
+MAX_RETRIES = 6
+MAX_BACKOFF = 60  # 재시도 대기 상한 (초)
+MAX_TOKENS = 500
+MIN_RATE_SCALE = 0.1  # 429가 반복돼도 설정 속도의 10% 아래로는 낮추지 않음
+MAX_PACK_TOKENS = 8192  # 묶음 요청의 출력 토큰 상한
+DEFAULT_PACK_TOKENS = 0  # 0이면 행마다 개별 요청
+ROW_PACK_TOKENS = 300  # --row-pack: 한 행의 셀 합계가 이 이하이면 한 요청으로 묶음
+BATCH_API_MAX_REQUESTS = 50_000  # Batch API 파일 하나당 최대 요청 수
+DEFAULT_BATCH_POLL_SECONDS = 60
+PIPELINE_DEPTH = 2  # 동시에 진행하는 배치 수 (앞 배치의 꼬리와 다음 배치를 겹침)
+SYSTEM_PROMPT = "Translate the following text to {target_lang}. Only return the translation."
+PACK_SYSTEM_PROMPT = (
+    "Translate each string in the following JSON array to {target_lang}. "
+    "Return only a JSON array of strings containing the translations, "
+    "with exactly the same number of items in the same order."
+)
 
-# OpenAI 클라이언트 초기화
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
 
+def estimate_tokens(text: str) -> int:
+    """토큰 수 추정 (UTF-8 4바이트당 1토큰, 한글처럼 멀티바이트 문자는 더 크게 계산)"""
+    return len(text.encode("utf-8")) // 4 + 1
 
-def translate_text(text: str, target_lang: str = "Korean") -> str:
-    """텍스트를 목표 언어로 번역"""
-    if pd.isna(text) or text.strip() == "":
-        return text
+
+def estimate_request_tokens(system_prompt: str, text: str, max_tokens: int = MAX_TOKENS) -> int:
+    """요청 1건의 예상 토큰 비용 (프롬프트 + 번역 결과)"""
+    prompt_tokens = estimate_tokens(system_prompt) + estimate_tokens(text)
+    completion_tokens = min(max_tokens, estimate_tokens(text) * 2)  # 한국어 출력은 토큰이 더 많이 듦
+    return prompt_tokens + completion_tokens
+
+
+class RateLimiter:
+    """RPM/TPM 토큰 버킷 스케줄러 (모든 워커가 공유, 429 발생 시 전체 속도를 낮춤)"""
     
-    for attempt in range(MAX_RETRIES):
+    def __init__(self, rpm: int = DEFAULT_RPM, tpm: int = DEFAULT_TPM):
+        self.rpm = rpm
+        self.tpm = tpm
+        self.scale = 1.0  # 적응형 속도 배율 (429 시 감소, 성공 시 회복)
+        self.request_budget = float(rpm)
+        self.token_budget = float(tpm)
+        self.updated_at = time.monotonic()
+        self.paused_until = 0.0
+        self.stats = {"sent": 0, "throttled": 0, "retried": 0, "failed": 0, "split": 0, "deduped": 0}
+    
+    def _refill(self):
+        """경과 시간만큼 버킷 채우기 (용량은 분당 한도)"""
+        now = time.monotonic()
+        elapsed = now - self.updated_at
+        self.updated_at = now
+        if self.rpm:
+            self.request_budget = min(self.rpm, self.request_budget + elapsed * self.rpm * self.scale / 60)
+        if self.tpm:
+            self.token_budget = min(self.tpm, self.token_budget + elapsed * self.tpm * self.scale / 60)
+    
+    async def acquire(self, tokens: int):
+        """요청 1건과 예상 토큰만큼 예산이 생길 때까지 대기"""
+        if self.tpm:
+            tokens = min(tokens, self.tpm)  # 한도보다 큰 요청이 영원히 대기하지 않도록
+        throttled = False
+        
+        while True:
+            self._refill()
+            wait = self.paused_until - time.monotonic()
+            if wait <= 0:
+                waits = []
+                if self.rpm and self.request_budget < 1:
+                    waits.append((1 - self.request_budget) * 60 / (self.rpm * self.scale))
+                if self.tpm and self.token_budget < tokens:
+                    waits.append((tokens - self.token_budget) * 60 / (self.tpm * self.scale))
+                if not waits:
+                    # 검사와 차감 사이에 await가 없으므로 이벤트 루프 안에서 원자적
+                    self.request_budget -= 1
+                    self.token_budget -= tokens
+                    self.stats["sent"] += 1
+                    return
+                wait = max(waits)
+            
+            if not throttled:
+                self.stats["throttled"] += 1
+                throttled = True
+            await asyncio.sleep(wait)
+    
+    def on_rate_limited(self, retry_after: float):
+        """429 응답: 모든 워커를 retry_after 동안 멈추고 속도 배율을 낮춤"""
+        now = time.monotonic()
+        if now >= self.paused_until:
+            # 동시에 들어온 429들이 배율을 연쇄적으로 깎지 않도록 일시정지 구간당 한 번만 감소
+            self.scale = max(MIN_RATE_SCALE, self.scale * 0.8)
+        self.paused_until = max(self.paused_until, now + retry_after)
+    
+    def on_success(self):
+        """성공 응답: 속도 배율을 천천히 회복"""
+        self.scale = min(1.0, self.scale + 0.01)
+
+
+def get_retry_after(error: Exception) -> Optional[float]:
+    """429 응답의 Retry-After(-ms) 헤더를 초 단위로 읽기"""
+    response = getattr(error, "response", None)
+    if response is None:
+        return None
+    
+    for header, unit in (("retry-after-ms", 1000), ("retry-after", 1)):
+        value = response.headers.get(header)
+        if value is None:
+            continue
         try:
-            response = client.chat.completions.create(
-                model="gpt-4.1",
-                messages=[
-                    {"role": "system", "content": f"Translate the following text to {target_lang}. Only return the translation."},
-                    {"role": "user", "content": text}
-                ],
-                temperature=0.3,
-                max_tokens=500
+            return float(value) / unit
+        except ValueError:
+            continue  # HTTP-date 형식은 무시하고 지수 백오프 사용
+    return None
+
+
+def backoff_delay(attempt: int, retry_after: Optional[float] = None) -> float:
+    """지터가 적용된 재시도 대기 시간 (Retry-After가 있으면 우선)"""
+    if retry_after is not None:
+        return retry_after + random.uniform(0, 1)
+    return random.uniform(0, min(MAX_BACKOFF, 2 ** attempt))  # Full jitter
+
+
+class TranslationCache:
+    """번역 결과 SQLite 캐시 (키: 모델/목표 언어/프롬프트/원문 해시, LRU로 최대 항목 수 유지)"""
+    
+    QUERY_CHUNK = 500  # SQLite 변수 개수 제한을 넘지 않도록 나눠서 조회
+    
+    def __init__(
+        self,
+        path: Path = DEFAULT_CACHE_PATH,
+        max_entries: int = DEFAULT_CACHE_SIZE,
+        target_lang: str = "Korean",
+        model: str = MODEL,
+        prompt: str = SYSTEM_PROMPT
+    ):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_entries = max_entries
+        self.target_lang = target_lang
+        self.model = model
+        self.prompt = prompt
+        self.hits = 0
+        self.misses = 0
+        
+        self.conn = sqlite3.connect(self.path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS translations ("
+            "key TEXT PRIMARY KEY, translation TEXT NOT NULL, last_used REAL NOT NULL)"
+        )
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_last_used ON translations(last_used)")
+        self.conn.commit()
+    
+    def make_key(self, text: str) -> str:
+        """(모델, 목표 언어, 프롬프트, 원문)의 SHA-256 해시"""
+        payload = json.dumps([self.model, self.target_lang, self.prompt, text], ensure_ascii=False)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+    
+    def get_many(self, texts: List[str]) -> Dict[str, str]:
+        """캐시에 있는 번역만 {원문: 번역}으로 반환하고 사용 시각 갱신"""
+        keys = {self.make_key(text): text for text in texts}
+        found = {}
+        key_list = list(keys)
+        
+        for i in range(0, len(key_list), self.QUERY_CHUNK):
+            chunk = key_list[i:i+self.QUERY_CHUNK]
+            placeholders = ",".join("?" * len(chunk))
+            rows = self.conn.execute(
+                f"SELECT key, translation FROM translations WHERE key IN ({placeholders})", chunk
+            ).fetchall()
+            for key, translation in rows:
+                found[keys[key]] = translation
+            if rows:
+                self.conn.executemany(
+                    "UPDATE translations SET last_used = ? WHERE key = ?",
+                    [(time.time(), key) for key, _ in rows]
+                )
+        self.conn.commit()
+        
+        self.hits += len(found)
+        self.misses += len(keys) - len(found)
+        return found
+    
+    def put_many(self, translations: Dict[str, str]):
+        """새 번역 저장 후 최대 항목 수를 넘으면 LRU 삭제"""
+        if not translations:
+            return
+        now = time.time()
+        self.conn.executemany(
+            "INSERT OR REPLACE INTO translations (key, translation, last_used) VALUES (?, ?, ?)",
+            [(self.make_key(text), translation, now) for text, translation in translations.items()]
+        )
+        self.evict()
+        self.conn.commit()
+    
+    def evict(self):
+        """오래 사용하지 않은 항목부터 삭제해 max_entries 유지"""
+        count = self.conn.execute("SELECT COUNT(*) FROM translations").fetchone()[0]
+        overflow = count - self.max_entries
+        if overflow > 0:
+            self.conn.execute(
+                "DELETE FROM translations WHERE key IN "
+                "(SELECT key FROM translations ORDER BY last_used LIMIT ?)",
+                (overflow,)
             )
+    
+    def close(self):
+        self.conn.close()
+
+
+def create_client(base_url: Optional[str] = None) -> AsyncOpenAI:
+    """비동기 OpenAI 클라이언트 생성 (재시도는 RateLimiter가 담당하므로 SDK 자체 재시도는 끔)"""
+    return AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"), base_url=base_url, max_retries=0)
+
+
+def is_blank(text) -> bool:
+    """번역할 필요가 없는 값 (NaN, 빈 문자열)"""
+    return pd.isna(text) or str(text).strip() == ""
+
+
+async def request_translation(
+    client: AsyncOpenAI,
+    semaphore: asyncio.Semaphore,
+    limiter: RateLimiter,
+    system_prompt: str,
+    content: str,
+    max_tokens: int = MAX_TOKENS,
+    model: str = MODEL
+) -> Optional[str]:
+    """채팅 요청 1건 전송 (재시도 포함, 최종 실패 시 None)"""
+    tokens = estimate_request_tokens(system_prompt, content, max_tokens)
+    
+    for attempt in range(MAX_RETRIES):
+        retry_after = None
+        try:
+            async with semaphore:
+                await limiter.acquire(tokens)
+                response = await client.chat.completions.create(
+                    model=model,
+                    messages=[
+                        {"role": "system", "content": system_prompt},
+                        {"role": "user", "content": content}
+                    ],
+                    temperature=0.3,
+                    max_tokens=max_tokens
+                )
+            limiter.on_success()
             return response.choices[0].message.content.strip()
+        except RateLimitError as e:
+            retry_after = backoff_delay(attempt, get_retry_after(e))
+            limiter.on_rate_limited(retry_after)
+            error = e
         except Exception as e:
-            if attempt < MAX_RETRIES - 1:
-                time.sleep(2 ** attempt)  # Exponential backoff
-            else:
-                print(f"번역 실패: {text[:50]}... - 오류: {str(e)}")
-                return text  # 실패 시 원본 반환
+            error = e
+        
+        if attempt < MAX_RETRIES - 1:
+            limiter.stats["retried"] += 1
+            # 대기 중에는 세마포어를 반납해 다른 요청이 진행되도록 함
+            await asyncio.sleep(retry_after if retry_after is not None else backoff_delay(attempt))
+    
+    limiter.stats["failed"] += 1
+    print(f"번역 실패: {content[:50]}... - 오류: {str(error)}")
+    return None
 
 
-def translate_batch(batch_data: List[tuple]) -> List[tuple]:
-    """배치 데이터 번역 (pqdm에서 사용)"""
-    results = []
+async def translate_text(
+    client: AsyncOpenAI,
+    semaphore: asyncio.Semaphore,
+    limiter: RateLimiter,
+    text: str,
+    target_lang: str = "Korean",
+    model: str = MODEL
+) -> Optional[str]:
+    """텍스트를 목표 언어로 번역 (최종 실패 시 None → 해당 행은 미번역으로 남음)"""
+    if is_blank(text):
+        return text
+    
+    system_prompt = SYSTEM_PROMPT.format(target_lang=target_lang)
+    return await request_translation(client, semaphore, limiter, system_prompt, str(text), model=model)
+
+
+def build_packs(batch_data: List[tuple], pack_tokens: int) -> List[List[tuple]]:
+    """연속된 행들을 예상 토큰 pack_tokens 이하 묶음으로 나눔 (빈 값은 단독 묶음)"""
+    packs = []
+    current, current_tokens = [], 0
+    
     for idx, text in batch_data:
-        translated = translate_text(text)
-        results.append((idx, translated))
-    return results
+        if is_blank(text):
+            packs.append([(idx, text)])
+            continue
+        
+        tokens = estimate_tokens(str(text))
+        if current and current_tokens + tokens > pack_tokens:
+            packs.append(current)
+            current, current_tokens = [], 0
+        current.append((idx, text))
+        current_tokens += tokens
+    
+    if current:
+        packs.append(current)
+    return packs
 
 
-def save_checkpoint(df: pd.DataFrame, checkpoint_path: Path, progress: Dict):
-    """체크포인트 저장"""
-    df.to_csv(checkpoint_path, index=False)
-    progress_path = checkpoint_path.parent / f"{checkpoint_path.stem}_progress.json"
-    with open(progress_path, 'w') as f:
-        json.dump(progress, f)
-    print(f"체크포인트 저장: {progress['processed_rows']}행 완료")
+def parse_pack_response(content: Optional[str], expected: int) -> Optional[List[str]]:
+    """묶음 응답(JSON 배열)을 행 단위로 분리 (형식/개수가 맞지 않으면 None)"""
+    if content is None:
+        return None
+    
+    content = content.strip()
+    if content.startswith("```"):
+        # ```json ... ``` 코드 블록으로 감싼 응답 처리
+        content = content.strip("`").strip()
+        if content.startswith("json"):
+            content = content[4:]
+    
+    try:
+        items = json.loads(content)
+    except json.JSONDecodeError:
+        return None
+    
+    if not isinstance(items, list) or len(items) != expected:
+        return None
+    if not all(isinstance(item, str) for item in items):
+        return None
+    return [item.strip() for item in items]
 
 
-def load_checkpoint(input_file: str, columns: List[str]) -> tuple:
-    """이전 진행 상황 로드"""
-    checkpoint_name = Path(input_file).stem
-    checkpoint_path = CHECKPOINT_DIR / f"{checkpoint_name}_checkpoint.csv"
-    progress_path = CHECKPOINT_DIR / f"{checkpoint_name}_progress.json"
+async def translate_pack(
+    client: AsyncOpenAI,
+    semaphore: asyncio.Semaphore,
+    limiter: RateLimiter,
+    texts: List[str],
+    target_lang: str = "Korean",
+    model: str = MODEL
+) -> List[Optional[str]]:
+    """여러 행을 JSON 배열로 묶어 한 번에 번역 (응답이 어긋나면 반으로 나눠 재시도)"""
+    if len(texts) == 1:
+        return [await translate_text(client, semaphore, limiter, texts[0], target_lang, model)]
+    
+    system_prompt = PACK_SYSTEM_PROMPT.format(target_lang=target_lang)
+    content = json.dumps([str(text) for text in texts], ensure_ascii=False)
+    max_tokens = min(MAX_PACK_TOKENS, MAX_TOKENS * len(texts))
+    response = await request_translation(client, semaphore, limiter, system_prompt, content, max_tokens, model)
+    
+    if response is None:
+        # 재시도까지 모두 실패한 요청은 쪼개도 요청 수만 늘어나므로 그대로 실패 처리
+        return [None] * len(texts)
+    
+    translations = parse_pack_response(response, len(texts))
+    if translations is not None:
+        return translations
     
-    if checkpoint_path.exists() and progress_path.exists():
-        with open(progress_path, 'r') as f:
-            progress = json.load(f)
+    limiter.stats["split"] += 1
+    middle = len(texts) // 2
+    left, right = await asyncio.gather(
+        translate_pack(client, semaphore, limiter, texts[:middle], target_lang, model),
+        translate_pack(client, semaphore, limiter, texts[middle:], target_lang, model)
+    )
+    return left + right
+
+
+class TranslationBackend(Protocol):
+    """번역 백엔드 인터페이스 (async with로 이벤트 루프 안에서 자원을 열고 닫음)
+    
+    model/prompt는 캐시 키에 쓰이므로 번역 결과가 달라지는 설정이면 값도 달라야 함
+    """
+    model: str
+    prompt: str
+    
+    async def __aenter__(self) -> "TranslationBackend": ...
+    
+    async def __aexit__(self, *exc_info): ...
+    
+    async def translate_many(self, texts: List[str]) -> List[Optional[str]]:
+        """texts를 번역해 같은 순서로 반환 (실패한 항목은 None)"""
+        ...
+
+
+class OpenAIBackend:
+    """OpenAI 호환 채팅 API 백엔드 (base_url로 Ollama/vLLM 등 로컬 서버도 사용 가능)
+    
+    translate_many에 여러 텍스트를 넘기면 JSON 배열 한 요청으로 묶어 번역.
+    """
+    
+    def __init__(
+        self,
+        limiter: RateLimiter,
+        model: str = MODEL,
+        base_url: Optional[str] = None,
+        max_workers: int = DEFAULT_MAX_WORKERS,
+        target_lang: str = "Korean"
+    ):
+        self.limiter = limiter
+        self.model = model
+        self.prompt = SYSTEM_PROMPT
+        self.base_url = base_url
+        self.max_workers = max_workers
+        self.target_lang = target_lang
+        self.client = None
+        self.semaphore = None
+    
+    async def __aenter__(self) -> "OpenAIBackend":
+        # 클라이언트와 세마포어는 현재 이벤트 루프에 묶이므로 asyncio.run마다 새로 만듦
+        self.client = create_client(self.base_url)
+        self.semaphore = asyncio.Semaphore(self.max_workers)
+        return self
+    
+    async def __aexit__(self, *exc_info):
+        await self.client.close()
+        self.client = None
+    
+    async def translate_many(self, texts: List[str]) -> List[Optional[str]]:
+        return await translate_pack(self.client, self.semaphore, self.limiter, texts, self.target_lang, self.model)
+
+
+class HFSeq2SeqBackend:
+    """Hugging Face seq2seq 모델을 프로세스 안에서 실행 (기본 CPU, 요청 비용 없음)
+    
+    여러 워커가 동시에 넘긴 텍스트를 큐에 모은 뒤 길이순으로 정렬해 batch_size개씩
+    생성하므로 패딩 낭비가 적음 (동적 배칭). 생성은 스레드에서 실행해 이벤트 루프를 막지 않음.
+    """
+    
+    def __init__(
+        self,
+        limiter: RateLimiter,
+        model: str = DEFAULT_HF_MODEL,
+        device: str = "cpu",
+        batch_size: int = DEFAULT_HF_BATCH_SIZE,
+        src_lang: str = DEFAULT_HF_SRC_LANG,
+        tgt_lang: str = DEFAULT_HF_TGT_LANG,
+        max_wait: float = HF_BATCH_WAIT_SECONDS
+    ):
+        # transformers/torch는 이 백엔드를 쓸 때만 필요
+        import torch
+        from transformers import AutoModelForSeq2SeqLM, AutoTokenizer
         
-        # 동일한 컬럼을 번역하는지 확인
-        if set(progress.get('columns', [])) == set(columns):
-            df = pd.read_csv(checkpoint_path)
-            print(f"체크포인트 로드: {progress['processed_rows']}행부터 재시작")
-            return df, progress['processed_rows']
+        self.torch = torch
+        self.limiter = limiter
+        self.model = model
+        self.prompt = f"{src_lang}->{tgt_lang}"
+        self.device = device
+        self.batch_size = batch_size
+        self.max_wait = max_wait
+        
+        print(f"모델 로드 중: {model} ({device})")
+        self.tokenizer = AutoTokenizer.from_pretrained(model, src_lang=src_lang)
+        self.seq2seq = AutoModelForSeq2SeqLM.from_pretrained(model).to(device).eval()
+        # NLLB/M2M처럼 목표 언어 토큰으로 시작해야 하는 모델 지원
+        tgt_token_id = self.tokenizer.convert_tokens_to_ids(tgt_lang)
+        self.forced_bos_token_id = tgt_token_id if tgt_token_id != self.tokenizer.unk_token_id else None
+        self.queue = None
+        self.runner = None
+    
+    async def __aenter__(self) -> "HFSeq2SeqBackend":
+        self.queue = asyncio.Queue()
+        self.runner = asyncio.create_task(self._run())
+        return self
+    
+    async def __aexit__(self, *exc_info):
+        self.runner.cancel()
+        try:
+            await self.runner
+        except asyncio.CancelledError:
+            pass
+    
+    async def translate_many(self, texts: List[str]) -> List[Optional[str]]:
+        loop = asyncio.get_running_loop()
+        futures = []
+        for text in texts:
+            future = loop.create_future()
+            await self.queue.put((str(text), future))
+            futures.append(future)
+        return list(await asyncio.gather(*futures))
+    
+    async def _run(self):
+        """큐에서 max_wait초 동안 텍스트를 모아 길이순 배치로 생성"""
+        loop = asyncio.get_running_loop()
+        
+        while True:
+            items = [await self.queue.get()]
+            deadline = loop.time() + self.max_wait
+            while len(items) < self.batch_size * HF_BATCHES_PER_WINDOW:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    items.append(await asyncio.wait_for(self.queue.get(), remaining))
+                except asyncio.TimeoutError:
+                    break
+            
+            items.sort(key=lambda item: len(item[0]))
+            for i in range(0, len(items), self.batch_size):
+                batch = items[i:i+self.batch_size]
+                texts = [text for text, _ in batch]
+                self.limiter.stats["sent"] += 1
+                try:
+                    outputs = await loop.run_in_executor(None, self._generate, texts)
+                except Exception as e:
+                    self.limiter.stats["failed"] += 1
+                    print(f"번역 실패: 배치 {len(texts)}개 - 오류: {str(e)}")
+                    outputs = [None] * len(texts)
+                for (_, future), output in zip(batch, outputs):
+                    if not future.done():
+                        future.set_result(output)
     
-    return None, 0
+    def _generate(self, texts: List[str]) -> List[str]:
+        with self.torch.no_grad():
+            inputs = self.tokenizer(texts, return_tensors="pt", padding=True, truncation=True).to(self.device)
+            generate_kwargs = {"max_new_tokens": MAX_TOKENS}
+            if self.forced_bos_token_id is not None:
+                generate_kwargs["forced_bos_token_id"] = self.forced_bos_token_id
+            outputs = self.seq2seq.generate(**inputs, **generate_kwargs)
+        return [text.strip() for text in self.tokenizer.batch_decode(outputs, skip_special_tokens=True)]
 
 
-def translate_csv(
-    input_file: str,
+def create_backend(
+    name: str,
+    limiter: RateLimiter,
+    model: Optional[str] = None,
+    base_url: Optional[str] = None,
+    max_workers: int = DEFAULT_MAX_WORKERS,
+    hf_device: str = "cpu",
+    hf_batch_size: int = DEFAULT_HF_BATCH_SIZE
+) -> TranslationBackend:
+    """--backend 이름으로 번역 백엔드 생성"""
+    if name == "openai":
+        return OpenAIBackend(limiter, model=model or MODEL, base_url=base_url, max_workers=max_workers)
+    if name == "hf":
+        return HFSeq2SeqBackend(limiter, model=model or DEFAULT_HF_MODEL, device=hf_device, batch_size=hf_batch_size)
+    raise ValueError(f"지원하지 않는 백엔드: {name}")
+
+
+def build_row_packs(pending: List[tuple], row_of: Dict[str, int], max_tokens: int) -> List[List[tuple]]:
+    """같은 행의 셀들을 한 묶음으로 (합계가 max_tokens를 넘는 행은 셀별로 요청)"""
+    rows = defaultdict(list)
+    for key, text in pending:
+        rows[row_of[key]].append((key, text))
+    
+    packs = []
+    for cells in rows.values():
+        if sum(estimate_tokens(text) for _, text in cells) <= max_tokens:
+            packs.append(cells)
+        else:
+            packs.extend([cell] for cell in cells)
+    return packs
+
+
+async def translate_batch_async(
+    batch_data: List[tuple],
+    limiter: RateLimiter,
+    backend: TranslationBackend,
+    progress: Optional[tqdm] = None,
+    pack_tokens: int = DEFAULT_PACK_TOKENS,
+    row_pack: bool = False,
+    cache: Optional[TranslationCache] = None,
+    on_result: Optional[Callable[[List[tuple]], None]] = None,
+    in_flight: Optional[Dict[str, asyncio.Future]] = None
+) -> List[tuple]:
+    """배치 데이터를 백엔드로 동시에 번역 (입력 순서 유지)
+    
+    row_pack이면 idx는 (row, column)이어야 하며 같은 행의 짧은 셀들을 한 요청으로 묶음.
+    on_result가 있으면 요청이 끝날 때마다 성공한 (idx, 번역) 목록으로 호출 (저널 기록용).
+    in_flight는 배치 간에 공유하는 {원문: 번역 future} - 다른 배치가 요청 중이거나 이미 번역한
+    원문은 다시 요청하지 않고 그 결과를 기다림 (캐시를 끈 실행이나 겹쳐 도는 배치 사이의 중복 제거)
+    """
+    if in_flight is None:
+        in_flight = {}
+    
+    # 같은 원문은 한 번만 번역하고, 캐시에 있거나 다른 배치가 맡은 원문은 요청하지 않음
+    rows_by_text = defaultdict(list)
+    for idx, text in batch_data:
+        if not is_blank(text):
+            rows_by_text[str(text)].append(idx)
+    shared = {text: in_flight[text] for text in rows_by_text if text in in_flight}
+    limiter.stats["deduped"] += sum(len(rows) for rows in rows_by_text.values()) - len(rows_by_text) + len(shared)
+    translations = cache.get_many([text for text in rows_by_text if text not in shared]) if cache else {}
+    pending = [(text, text) for text in rows_by_text if text not in translations and text not in shared]
+    loop = asyncio.get_running_loop()
+    futures = {text: loop.create_future() for text, _ in pending}
+    in_flight.update(futures)
+    
+    def report(pairs):
+        done = 0
+        cells = []
+        for text, translated in pairs:
+            done += len(rows_by_text[text])
+            if translated is not None:
+                cells.extend((idx, translated) for idx in rows_by_text[text])
+        if on_result:
+            on_result(cells)
+        if progress is not None:
+            progress.update(done)
+            progress.set_postfix(limiter.stats, refresh=False)
+    
+    # 빈 값과 캐시 적중은 바로 완료 처리
+    if progress is not None:
+        progress.update(len(batch_data) - sum(len(rows) for rows in rows_by_text.values()))
+    report(translations.items())
+    
+    # pack_tokens가 있으면 여러 셀을 한 요청으로, row_pack이면 같은 행의 셀들을 한 요청으로 묶음
+    if pack_tokens:
+        units = build_packs(pending, pack_tokens)
+    elif row_pack:
+        units = build_row_packs(pending, {text: rows[0][0] for text, rows in rows_by_text.items()}, ROW_PACK_TOKENS)
+    else:
+        units = [[item] for item in pending]
+    
+    async def worker(unit):
+        keys = [key for key, _ in unit]
+        texts = [text for _, text in unit]
+        try:
+            translated = await backend.translate_many(texts)
+        except BaseException:
+            for key in keys:
+                in_flight.pop(key, None)
+                futures[key].cancel()
+            raise
+        for key, value in zip(keys, translated):
+            if value is None:
+                in_flight.pop(key, None)   # 실패한 원문은 이후 배치에서 다시 요청
+            futures[key].set_result(value)
+        report(zip(keys, translated))
+        return list(zip(keys, translated))
+    
+    async def follow(text, future):
+        # 이 배치가 취소되어도 공유 future는 취소되지 않도록 shield
+        translated = await asyncio.shield(future)
+        report([(text, translated)])
+        return text, translated
+    
+    results, followed = await asyncio.gather(
+        asyncio.gather(*(worker(unit) for unit in units)),
+        asyncio.gather(*(follow(text, future) for text, future in shared.items()))
+    )
+    
+    # 실패(None)한 번역은 캐시하지 않음
+    new_translations = {
+        key: translated
+        for unit_results in results
+        for key, translated in unit_results
+        if translated is not None
+    }
+    if cache:
+        cache.put_many(new_translations)
+    translations.update(new_translations)
+    translations.update((text, translated) for text, translated in followed if translated is not None)
+    
+    return [
+        (idx, text if is_blank(text) else translations.get(str(text)))
+        for idx, text in batch_data
+    ]
+
+
+async def translate_batches_async(
+    batches: List[List[tuple]],
+    limiter: RateLimiter,
+    on_batch_done: Callable[[List[tuple]], None],
+    backend: TranslationBackend,
+    desc: Optional[str] = None,
+    **batch_kwargs
+):
+    """여러 배치를 한 이벤트 루프에서 겹쳐 실행 (앞 배치의 꼬리 동안 다음 배치를 시작해 워커가 쉬지 않음)
+    
+    원문 → 번역 future 맵을 배치 간에 공유해 같은 원문은 실행 전체에서 한 번만 요청
+    """
+    running = deque()
+    in_flight = {}
+    
+    async with backend:
+        with tqdm(total=sum(len(batch) for batch in batches), desc=desc) as progress:
+            for batch in batches:
+                running.append(asyncio.create_task(
+                    translate_batch_async(batch, limiter, backend, progress, in_flight=in_flight, **batch_kwargs)
+                ))
+                if len(running) >= PIPELINE_DEPTH:
+                    on_batch_done(await running.popleft())
+            while running:
+                on_batch_done(await running.popleft())
+
+
+def translate_batch(
+    batch_data: List[tuple],
+    limiter: RateLimiter,
+    backend: Optional[TranslationBackend] = None,
+    desc: Optional[str] = None,
+    **batch_kwargs
+) -> List[tuple]:
+    """배치 하나를 동기 코드에서 번역 (backend 미지정 시 OpenAI, limiter/cache는 배치 간에도 공유)"""
+    if backend is None:
+        backend = OpenAIBackend(limiter)
+    results = []
+    asyncio.run(translate_batches_async([batch_data], limiter, results.extend, backend, desc, **batch_kwargs))
+    return results
+
+
+class TranslationJournal:
+    """번역 결과 추가 전용 저널 (JSONL 한 줄에 (row, column, text), N행 또는 T초마다 fsync)"""
+    
+    def __init__(
+        self,
+        path: Path,
+        flush_rows: int = DEFAULT_CHECKPOINT_INTERVAL,
+        flush_seconds: float = DEFAULT_CHECKPOINT_SECONDS
+    ):
+        self.path = Path(path)
+        self.flush_rows = flush_rows
+        self.flush_seconds = flush_seconds
+        self.file = None
+        self.pending = 0
+        self.last_flush = time.monotonic()
+    
+    def replay(self, df: pd.DataFrame, columns: List[str], row_offset: int = 0) -> int:
+        """저널 기록을 df의 <column>_ko에 다시 적용 (row_offset은 df 첫 행의 전체 행 번호)"""
+        if not self.path.exists():
+            return 0
+        
+        updates = {column: {} for column in columns}
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue  # 중단 시점에 쓰다 만 마지막 줄
+                row = record['row'] - row_offset
+                if record['column'] in updates and 0 <= row < len(df):
+                    updates[record['column']][row] = record['text']
+        
+        replayed = 0
+        for column, rows in updates.items():
+            if not rows:
+                continue
+            translated_column = f"{column}_ko"
+            prepare_translated_columns(df, [column])
+            df.loc[list(rows), translated_column] = list(rows.values())
+            replayed += len(rows)
+        return replayed
+    
+    def write(self, row: int, column: str, text: str):
+        """번역 1건 기록 (flush_rows행 또는 flush_seconds초가 지나면 디스크에 반영)"""
+        if self.file is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self.file = open(self.path, 'a', encoding='utf-8')
+        
+        self.file.write(json.dumps({'row': int(row), 'column': column, 'text': text}, ensure_ascii=False) + "\n")
+        self.pending += 1
+        if self.pending >= self.flush_rows or time.monotonic() - self.last_flush >= self.flush_seconds:
+            self.flush()
+    
+    def flush(self):
+        if self.file is not None and self.pending:
+            self.file.flush()
+            os.fsync(self.file.fileno())
+        self.pending = 0
+        self.last_flush = time.monotonic()
+    
+    def reset(self):
+        """이미 출력에 반영된 기록 비우기 (스트리밍 모드에서 청크 완료 후)"""
+        self.close()
+        if self.path.exists():
+            self.path.unlink()
+    
+    def close(self):
+        if self.file is not None:
+            self.flush()
+            self.file.close()
+            self.file = None
+
+
+def journal_path(input_file: str) -> Path:
+    return CHECKPOINT_DIR / f"{Path(input_file).stem}_journal.jsonl"
+
+
+def is_parquet(path: str) -> bool:
+    return Path(path).suffix == ".parquet"
+
+
+def prepare_translated_columns(df: pd.DataFrame, columns: List[str]):
+    """<column>_ko 컬럼을 문자열을 담을 수 있는 object 컬럼으로 준비
+
+    전부 실패해 빈 값만 남은 _ko 컬럼을 CSV에서 다시 읽으면 float64가 되는데,
+    pandas 3에서는 여기에 문자열을 넣으면 TypeError가 나므로 미리 변환
+    """
+    for column in columns:
+        translated_column = f"{column}_ko"
+        if translated_column not in df.columns:
+            df[translated_column] = None
+        elif df[translated_column].dtype != object:
+            df[translated_column] = df[translated_column].astype(object).where(df[translated_column].notna(), None)
+
+
+def iter_input_chunks(input_file: str, chunk_rows: int, skip_rows: int = 0) -> Iterator[pd.DataFrame]:
+    """입력 파일을 chunk_rows행씩 읽기 (CSV/Parquet, 앞의 skip_rows행은 건너뜀)"""
+    if is_parquet(input_file):
+        import pyarrow.parquet as pq
+        
+        skipped = 0
+        for batch in pq.ParquetFile(input_file).iter_batches(batch_size=chunk_rows):
+            if skipped + batch.num_rows <= skip_rows:
+                skipped += batch.num_rows
+                continue
+            if skipped < skip_rows:
+                batch = batch.slice(skip_rows - skipped)
+                skipped = skip_rows
+            yield batch.to_pandas()
+    else:
+        # 헤더(0행)는 남기고 이미 처리한 데이터 행만 건너뜀
+        # range를 넘기면 pandas가 set으로 바꿔 skip_rows개 정수를 메모리에 올리므로 함수로 판정
+        yield from pd.read_csv(input_file, chunksize=chunk_rows, skiprows=lambda i: 0 < i <= skip_rows)
+
+
+def stream_manifest_path(input_file: str) -> Path:
+    return CHECKPOINT_DIR / f"{Path(input_file).stem}_stream.json"
+
+
+def load_stream_manifest(input_file: str, columns: List[str], output_file: str) -> Dict:
+    """스트리밍 진행 매니페스트 로드 (컬럼/출력 파일이 같을 때만 이어서 진행)"""
+    manifest_path = stream_manifest_path(input_file)
+    
+    if manifest_path.exists():
+        with open(manifest_path, 'r') as f:
+            manifest = json.load(f)
+        if manifest.get('columns') == columns and manifest.get('output') == str(output_file):
+            print(f"매니페스트 로드: {manifest['rows_done']:,}행부터 재시작")
+            return manifest
+    
+    return {'columns': columns, 'output': str(output_file), 'rows_done': 0, 'parts': 0, 'output_bytes': 0}
+
+
+def save_stream_manifest(input_file: str, manifest: Dict):
+    """매니페스트를 임시 파일에 쓴 뒤 교체 (쓰는 도중 중단돼도 이전 매니페스트 유지)"""
+    manifest_path = stream_manifest_path(input_file)
+    tmp_path = manifest_path.with_suffix(".tmp")
+    with open(tmp_path, 'w') as f:
+        json.dump(manifest, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, manifest_path)
+
+
+def prepare_stream_output(output_file: str, manifest: Dict):
+    """매니페스트에 기록되지 않은(중단 직전에 쓰다 만) 출력 제거"""
+    output_path = Path(output_file)
+    
+    if is_parquet(output_file):
+        output_path.mkdir(parents=True, exist_ok=True)
+        for part in output_path.glob("part-*.parquet"):
+            if int(part.stem.split("-")[1]) >= manifest['parts']:
+                part.unlink()
+    elif output_path.exists():
+        os.truncate(output_path, manifest['output_bytes'])
+
+
+def append_stream_chunk(df: pd.DataFrame, output_file: str, manifest: Dict):
+    """완료된 청크를 출력에 추가 (Parquet은 파트 파일 하나, CSV는 이어쓰기)"""
+    if is_parquet(output_file):
+        part_path = Path(output_file) / f"part-{manifest['parts']:05d}.parquet"
+        df.to_parquet(part_path, index=False)
+        manifest['parts'] += 1
+    else:
+        with open(output_file, 'a', encoding='utf-8', newline='') as f:
+            df.to_csv(f, header=manifest['output_bytes'] == 0, index=False)
+            f.flush()
+            os.fsync(f.fileno())
+        manifest['output_bytes'] = os.path.getsize(output_file)
+    
+    manifest['rows_done'] += len(df)
+
+
+def translate_columns(
+    df: pd.DataFrame,
     columns: List[str],
-    output_file: Optional[str] = None,
+    limiter: RateLimiter,
     chunk_size: int = DEFAULT_CHUNK_SIZE,
-    checkpoint_interval: int = DEFAULT_CHECKPOINT_INTERVAL,
-    max_workers: int = DEFAULT_MAX_WORKERS
-):
-    """CSV 파일의 지정된 컬럼을 번역"""
+    journal: Optional[TranslationJournal] = None,
+    row_offset: int = 0,
+    **translate_kwargs
+) -> int:
+    """메모리에 올린 데이터의 모든 컬럼을 한 작업 큐로 번역하고 실패한 셀 수 반환
     
-    # 체크포인트 디렉토리 생성
-    CHECKPOINT_DIR.mkdir(exist_ok=True)
+    (row, column) 셀을 행 순서로 섞어 chunk_size개씩 배치로 만들기 때문에
+    컬럼이 바뀔 때마다 워커 풀이 비는 일이 없음. 결과는 셀 단위로 저널에 기록.
+    """
+    needs_translation = {}
+    prepare_translated_columns(df, columns)
+    for column in columns:
+        translated_column = f"{column}_ko"
+        # 번역이 필요한 셀 찾기 (저널에서 복원된 셀 제외)
+        needs_translation[column] = df[translated_column].isna().to_numpy()
+        print(f"'{column}' 컬럼: {needs_translation[column].sum():,}개 셀 번역 필요")
     
-    # 출력 파일명 설정
-    if not output_file:
-        output_file = Path(input_file).stem + "_translated.csv"
+    source = {column: df[column].to_numpy() for column in columns}
+    cells = [
+        ((row, column), source[column][row])
+        for row in range(len(df))
+        for column in columns
+        if needs_translation[column][row]
+    ]
     
-    # 데이터 로드
+    failed_cells = 0
+    if cells:
+        batches = [cells[i:i+chunk_size] for i in range(0, len(cells), chunk_size)]
+        print(f"{len(cells):,}개 셀을 {len(batches)}개 배치로 번역")
+        
+        def record(pairs):
+            # 배치가 끝나기를 기다리지 않고 요청이 끝날 때마다 저널에 기록
+            for (row, column), translated_text in pairs:
+                journal.write(row_offset + row, column, translated_text)
+        
+        def apply(results):
+            nonlocal failed_cells
+            for (row, column), translated_text in results:
+                df.at[row, f"{column}_ko"] = translated_text
+                if translated_text is None:
+                    failed_cells += 1
+        
+        asyncio.run(translate_batches_async(
+            batches,
+            limiter,
+            apply,
+            desc="번역",
+            on_result=record if journal is not None else None,
+            **translate_kwargs
+        ))
+    
+    # 청크마다 열 타입이 달라지지 않도록 (전부 실패한 청크도 Parquet 스키마 유지)
+    for column in columns:
+        df[f"{column}_ko"] = df[f"{column}_ko"].astype("string")
+    
+    return failed_cells
+
+
+def translate_stream(
+    input_file: str,
+    columns: List[str],
+    output_file: str,
+    limiter: RateLimiter,
+    stream_chunk_size: int = DEFAULT_STREAM_CHUNK_SIZE,
+    journal: Optional[TranslationJournal] = None,
+    **translate_kwargs
+) -> int:
+    """입력을 청크 단위로 읽어 번역 후 출력에 이어쓰기 (메모리에는 청크 하나만 유지)"""
+    manifest = load_stream_manifest(input_file, columns, output_file)
+    prepare_stream_output(output_file, manifest)
+    failed_rows = 0
+    
+    for chunk in iter_input_chunks(input_file, stream_chunk_size, skip_rows=manifest['rows_done']):
+        missing_columns = set(columns) - set(chunk.columns)
+        if missing_columns:
+            raise ValueError(f"존재하지 않는 컬럼: {missing_columns}")
+        
+        start_row = manifest['rows_done']
+        print(f"\n{start_row:,}~{start_row + len(chunk):,}행 번역 중...")
+        chunk = chunk.reset_index(drop=True)
+        if journal is not None:
+            # 완료되지 못한 청크의 번역 결과 복원
+            replayed = journal.replay(chunk, columns, row_offset=start_row)
+            if replayed:
+                print(f"저널에서 {replayed:,}개 번역 복원")
+        failed_rows += translate_columns(chunk, columns, limiter, journal=journal, row_offset=start_row, **translate_kwargs)
+        
+        # 출력이 디스크에 반영된 뒤에 매니페스트 갱신, 반영된 저널 기록은 비움
+        append_stream_chunk(chunk, output_file, manifest)
+        save_stream_manifest(input_file, manifest)
+        if journal is not None:
+            journal.reset()
+    
+    print(f"총 {manifest['rows_done']:,}개 행 처리")
+    return failed_rows
+
+
+def load_input_frame(input_file: str, columns: List[str], journal: Optional[TranslationJournal] = None) -> pd.DataFrame:
+    """CSV 전체 로드 후 컬럼 검증, 저널 재생 (이전 실행에서 번역된 셀 복원)"""
     print(f"파일 로드 중: {input_file}")
     df = pd.read_csv(input_file)
-    total_rows = len(df)
-    print(f"총 {total_rows:,}개 행 발견")
+    print(f"총 {len(df):,}개 행 발견")
     
     # 컬럼 검증
     missing_columns = set(columns) - set(df.columns)
     if missing_columns:
         raise ValueError(f"존재하지 않는 컬럼: {missing_columns}")
     
-    # 체크포인트 확인
-    checkpoint_df, start_row = load_checkpoint(input_file, columns)
-    if checkpoint_df is not None:
-        df = checkpoint_df
+    if journal is not None:
+        replayed = journal.replay(df, columns)
+        if replayed:
+            print(f"저널 로드: {replayed:,}개 번역 복원 후 재시작")
+    return df
+
+
+def translate_in_memory(
+    input_file: str,
+    columns: List[str],
+    output_file: str,
+    limiter: RateLimiter,
+    journal: Optional[TranslationJournal] = None,
+    **translate_kwargs
+) -> int:
+    """CSV 전체를 메모리에 올려 번역 (저널을 재생해 이어서 진행, 최종 결과는 한 번만 저장)"""
+    df = load_input_frame(input_file, columns, journal)
+    failed_rows = translate_columns(df, columns, limiter, journal=journal, **translate_kwargs)
     
-    # 번역 시작
+    # 최종 결과 저장
+    df.to_csv(output_file, index=False)
+    return failed_rows
+
+
+def batch_state_path(input_file: str) -> Path:
+    return CHECKPOINT_DIR / f"{Path(input_file).stem}_batch_state.json"
+
+
+def save_batch_state(input_file: str, state: Dict):
+    """제출한 배치 ID 기록 (임시 파일에 쓴 뒤 교체)"""
+    state_path = batch_state_path(input_file)
+    tmp_path = state_path.with_suffix(".tmp")
+    with open(tmp_path, 'w') as f:
+        json.dump(state, f, indent=2)
+    os.replace(tmp_path, state_path)
+
+
+def build_batch_request(custom_id: str, text: str, target_lang: str = "Korean", model: str = MODEL) -> Dict:
+    """Batch API 입력 JSONL 한 줄 (실시간 모드의 단일 행 요청과 같은 프롬프트)"""
+    return {
+        "custom_id": custom_id,
+        "method": "POST",
+        "url": "/v1/chat/completions",
+        "body": {
+            "model": model,
+            "messages": [
+                {"role": "system", "content": SYSTEM_PROMPT.format(target_lang=target_lang)},
+                {"role": "user", "content": text}
+            ],
+            "temperature": 0.3,
+            "max_tokens": MAX_TOKENS
+        }
+    }
+
+
+def parse_batch_output(content: str) -> Dict[str, Optional[str]]:
+    """Batch API 출력/에러 JSONL을 {custom_id: 번역}으로 변환 (실패한 요청은 None)"""
+    results = {}
+    for line in content.splitlines():
+        if not line.strip():
+            continue
+        record = json.loads(line)
+        response = record.get("response") or {}
+        if record.get("error") or response.get("status_code") != 200:
+            results[record["custom_id"]] = None
+            continue
+        results[record["custom_id"]] = response["body"]["choices"][0]["message"]["content"].strip()
+    return results
+
+
+def translate_with_batch_api(
+    input_file: str,
+    columns: List[str],
+    output_file: str,
+    journal: TranslationJournal,
+    cache: Optional[TranslationCache] = None,
+    base_url: Optional[str] = None,
+    poll_interval: float = DEFAULT_BATCH_POLL_SECONDS,
+    model: str = MODEL
+) -> int:
+    """Batch API로 오프라인 번역 (JSONL 제출 → 상태 폴링 → custom_id로 결과 병합)
+    
+    제출한 배치 ID는 체크포인트 폴더에 기록되므로 중단 후 다시 실행하면 새로 제출하지 않고 이어서 기다림.
+    """
+    df = load_input_frame(input_file, columns, journal)
+    prepare_translated_columns(df, columns)
+    
+    # 번역이 필요한 셀을 원문별로 모음 (같은 원문은 한 번만 요청)
+    source = {column: df[column].to_numpy() for column in columns}
+    cells_by_text = defaultdict(list)
     for column in columns:
-        print(f"\n'{column}' 컬럼 번역 시작...")
-        
-        # 번역할 행만 선택 (이미 번역된 행 제외)
-        translated_column = f"{column}_ko"
-        if translated_column not in df.columns:
-            df[translated_column] = None
-        
-        # 번역이 필요한 행 찾기
-        needs_translation = df[translated_column].isna()
-        if start_row > 0:
-            needs_translation = needs_translation & (df.index >= start_row)
+        for row in df.index[df[f"{column}_ko"].isna()]:
+            if not is_blank(source[column][row]):
+                cells_by_text[str(source[column][row])].append((row, column))
+    
+    def apply(text, translated):
+        for row, column in cells_by_text.get(text, []):
+            df.at[row, f"{column}_ko"] = translated
+            journal.write(row, column, translated)
+    
+    state_path = batch_state_path(input_file)
+    state = None
+    if state_path.exists():
+        with open(state_path, 'r') as f:
+            state = json.load(f)
+        if state.get('columns') != columns:
+            state = None
+        else:
+            print(f"배치 상태 로드: 제출된 배치 {len(state['batches'])}개에 다시 연결")
+    
+    if state is None:
+        # 캐시에 있는 원문은 바로 반영하고 나머지만 배치 파일로 작성
+        cached = cache.get_many(list(cells_by_text)) if cache else {}
+        for text, translated in cached.items():
+            apply(text, translated)
         
-        rows_to_translate = df[needs_translation].index.tolist()
+        requests = [
+            build_batch_request(f"{cells[0][0]}:{cells[0][1]}", text, model=model)
+            for text, cells in cells_by_text.items()
+            if text not in cached
+        ]
+        files = []
+        for i in range(0, len(requests), BATCH_API_MAX_REQUESTS):
+            batch_file = CHECKPOINT_DIR / f"{Path(input_file).stem}_batch_{i // BATCH_API_MAX_REQUESTS:04d}.jsonl"
+            with open(batch_file, 'w', encoding='utf-8') as f:
+                for request in requests[i:i+BATCH_API_MAX_REQUESTS]:
+                    f.write(json.dumps(request, ensure_ascii=False) + "\n")
+            files.append(str(batch_file))
         
-        if not rows_to_translate:
-            print(f"'{column}' 컬럼은 이미 모두 번역됨")
+        print(f"{len(requests):,}개 요청을 {len(files)}개 배치 파일로 작성 (캐시 적중 {len(cached):,}개)")
+        state = {'columns': columns, 'files': files, 'batches': {}}
+        # 상태 파일이 생기면 다시 실행할 때 캐시 반영을 건너뛰므로, 캐시 적중분을 먼저 저널에 확정
+        journal.flush()
+        save_batch_state(input_file, state)
+    
+    client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"), base_url=base_url)
+    
+    # 아직 제출하지 않은 파일만 제출 (하나 제출할 때마다 상태 저장)
+    for batch_file in state['files']:
+        if batch_file in state['batches']:
             continue
+        with open(batch_file, 'rb') as f:
+            uploaded = client.files.create(file=f, purpose="batch")
+        batch = client.batches.create(
+            input_file_id=uploaded.id,
+            endpoint="/v1/chat/completions",
+            completion_window="24h"
+        )
+        state['batches'][batch_file] = {'id': batch.id, 'status': batch.status, 'merged': False}
+        save_batch_state(input_file, state)
+        print(f"배치 제출: {batch.id} ({Path(batch_file).name})")
+    
+    # 완료될 때까지 폴링하며 결과 병합
+    while True:
+        waiting = [info for info in state['batches'].values() if not info['merged']]
+        if not waiting:
+            break
         
-        print(f"{len(rows_to_translate):,}개 행 번역 필요")
-        
-        # 배치 준비
-        batches = []
-        for i in range(0, len(rows_to_translate), chunk_size):
-            batch_indices = rows_to_translate[i:i+chunk_size]
-            batch_data = [(idx, df.loc[idx, column]) for idx in batch_indices]
-            batches.append(batch_data)
-        
-        # 병렬 번역 실행
-        print(f"{len(batches)}개 배치로 나누어 처리 (배치당 최대 {chunk_size}개)")
-        
-        processed_count = start_row
-        for i, batch in enumerate(batches):
-            # 배치 번역
-            results = pqdm(
-                [batch],
-                translate_batch,
-                n_jobs=1,  # 배치 자체가 이미 여러 항목을 포함
-                desc=f"배치 {i+1}/{len(batches)}"
-            )[0]
+        for info in waiting:
+            batch = client.batches.retrieve(info['id'])
+            info['status'] = batch.status
+            if batch.status not in ("completed", "failed", "expired", "cancelled"):
+                continue
             
-            # 결과 저장
-            for idx, translated_text in results:
-                df.loc[idx, translated_column] = translated_text
-                processed_count += 1
+            # 만료/취소된 배치도 끝난 요청의 결과는 출력 파일에 남아 있음
+            results = {}
+            for file_id in (batch.output_file_id, batch.error_file_id):
+                if file_id:
+                    results.update(parse_batch_output(client.files.content(file_id).text))
             
-            # 체크포인트 저장
-            if processed_count % checkpoint_interval == 0:
-                checkpoint_path = CHECKPOINT_DIR / f"{Path(input_file).stem}_checkpoint.csv"
-                progress = {
-                    'processed_rows': processed_count,
-                    'total_rows': total_rows,
-                    'columns': columns,
-                    'current_column': column
-                }
-                save_checkpoint(df, checkpoint_path, progress)
+            translations = {}
+            for custom_id, translated in results.items():
+                row, column = custom_id.split(":", 1)
+                text = str(source[column][int(row)])
+                if translated is not None:
+                    apply(text, translated)
+                    translations[text] = translated
+            if cache:
+                cache.put_many(translations)
+            journal.flush()
+            
+            info['merged'] = True
+            print(f"배치 {info['id']} {batch.status}: {len(translations):,}/{len(results):,}개 번역 병합")
+        
+        save_batch_state(input_file, state)
+        if any(not info['merged'] for info in state['batches'].values()):
+            statuses = [info['status'] for info in state['batches'].values() if not info['merged']]
+            print(f"대기 중: {', '.join(statuses)} - {poll_interval:g}초 후 다시 확인")
+            time.sleep(poll_interval)
     
-    # 최종 결과 저장
+    # 결과를 받지 못한 셀 수 (다시 실행하면 새 배치로 제출)
+    failed_cells = sum(
+        1
+        for cells in cells_by_text.values()
+        for row, column in cells
+        if pd.isna(df.at[row, f"{column}_ko"])
+    )
+    
+    for column in columns:
+        df[f"{column}_ko"] = df[f"{column}_ko"].astype("string")
     df.to_csv(output_file, index=False)
+    return failed_cells
+
+
+def translate_csv(
+    input_file: str,
+    columns: List[str],
+    output_file: Optional[str] = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    checkpoint_interval: int = DEFAULT_CHECKPOINT_INTERVAL,
+    checkpoint_seconds: float = DEFAULT_CHECKPOINT_SECONDS,
+    max_workers: int = DEFAULT_MAX_WORKERS,
+    base_url: Optional[str] = None,
+    backend: str = "openai",
+    model: Optional[str] = None,
+    hf_device: str = "cpu",
+    hf_batch_size: int = DEFAULT_HF_BATCH_SIZE,
+    rpm: int = DEFAULT_RPM,
+    tpm: int = DEFAULT_TPM,
+    pack_tokens: int = DEFAULT_PACK_TOKENS,
+    row_pack: bool = False,
+    cache_path: Optional[str] = str(DEFAULT_CACHE_PATH),
+    cache_size: int = DEFAULT_CACHE_SIZE,
+    stream: bool = False,
+    stream_chunk_size: int = DEFAULT_STREAM_CHUNK_SIZE,
+    batch_api: bool = False,
+    batch_poll_interval: float = DEFAULT_BATCH_POLL_SECONDS
+):
+    """CSV 파일의 지정된 컬럼을 번역 (cache_path=None이면 캐시 사용 안 함)"""
+    if stream and batch_api:
+        raise ValueError("--stream과 --batch-api는 함께 사용할 수 없습니다")
+    if batch_api and backend != "openai":
+        raise ValueError("--batch-api는 openai 백엔드에서만 사용할 수 있습니다")
+    
+    # 체크포인트 디렉토리 생성
+    CHECKPOINT_DIR.mkdir(exist_ok=True)
+    
+    # 출력 파일명 설정 (스트리밍 모드에서 Parquet 입력은 Parquet 파트 폴더로 출력)
+    if not output_file:
+        suffix = ".parquet" if stream and is_parquet(input_file) else ".csv"
+        output_file = Path(input_file).stem + "_translated" + suffix
+    
+    # 모든 배치/컬럼이 공유하는 요청 스케줄러
+    limiter = RateLimiter(rpm=rpm, tpm=tpm)
+    # 번역 결과 저널 (재시작 시 재생)
+    journal = TranslationJournal(journal_path(input_file), flush_rows=checkpoint_interval, flush_seconds=checkpoint_seconds)
+    # 번역 백엔드 (OpenAI 호환 API 또는 로컬 Hugging Face 모델)
+    translator = create_backend(backend, limiter, model, base_url, max_workers, hf_device, hf_batch_size)
+    # 파일/재실행 간에 유지되는 번역 캐시 (여러 컬럼의 같은 원문도 한 번만 번역)
+    cache = None
+    if cache_path:
+        cache = TranslationCache(Path(cache_path), max_entries=cache_size, model=translator.model, prompt=translator.prompt)
+    translate_kwargs = {
+        'chunk_size': chunk_size,
+        'backend': translator,
+        'pack_tokens': pack_tokens,
+        'row_pack': row_pack,
+        'cache': cache
+    }
+    
+    if batch_api:
+        print("Batch API 모드: 요청을 배치 파일로 제출하고 완료될 때까지 대기")
+        failed_rows = translate_with_batch_api(input_file, columns, output_file, journal, cache, base_url, batch_poll_interval, translator.model)
+    elif stream:
+        print(f"스트리밍 모드: {input_file}를 {stream_chunk_size:,}행씩 처리")
+        failed_rows = translate_stream(input_file, columns, output_file, limiter, stream_chunk_size, journal=journal, **translate_kwargs)
+    else:
+        failed_rows = translate_in_memory(input_file, columns, output_file, limiter, journal=journal, **translate_kwargs)
+    journal.close()
+    
     print(f"\n번역 완료! 결과 저장: {output_file}")
+    stats = limiter.stats
+    print(f"요청 통계: 전송 {stats['sent']:,} / 스로틀 {stats['throttled']:,} / 재시도 {stats['retried']:,} / 실패 {stats['failed']:,} / 묶음 분할 {stats['split']:,} / 중복 제거 {stats['deduped']:,}")
+    if cache:
+        lookups = cache.hits + cache.misses
+        hit_rate = cache.hits / lookups * 100 if lookups else 0
+        print(f"캐시 통계: 적중 {cache.hits:,} / 미적중 {cache.misses:,} (적중률 {hit_rate:.1f}%)")
+        cache.close()
+    if failed_rows:
+        print(f"⚠️ {failed_rows:,}개 셀 번역 실패 (빈 값으로 저장됨) - `--input {output_file}`로 다시 실행하면 해당 셀만 재번역")
     
     # 체크포인트 파일 정리
     checkpoint_files = list(CHECKPOINT_DIR.glob(f"{Path(input_file).stem}_*"))
@@ -208,10 +1331,27 @@ def main():
     parser = argparse.ArgumentParser(description="CSV 파일의 특정 컬럼을 한국어로 번역")
     parser.add_argument("--input", "-i", required=True, help="입력 CSV 파일")
     parser.add_argument("--columns", "-c", required=True, help="번역할 컬럼 (쉼표로 구분)")
-    parser.add_argument("--output", "-o", help="출력 파일 (기본: input_translated.csv)")
+    parser.add_argument("--output", "-o", help="출력 파일 (기본: input_translated.csv, .parquet이면 파트 파일 폴더)")
     parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help=f"배치 크기 (기본: {DEFAULT_CHUNK_SIZE})")
-    parser.add_argument("--checkpoint-interval", type=int, default=DEFAULT_CHECKPOINT_INTERVAL, help=f"체크포인트 간격 (기본: {DEFAULT_CHECKPOINT_INTERVAL})")
-    parser.add_argument("--max-workers", type=int, default=DEFAULT_MAX_WORKERS, help=f"최대 워커 수 (기본: {DEFAULT_MAX_WORKERS})")
+    parser.add_argument("--checkpoint-interval", type=int, default=DEFAULT_CHECKPOINT_INTERVAL, help=f"저널을 디스크에 반영하는 행 간격 (기본: {DEFAULT_CHECKPOINT_INTERVAL})")
+    parser.add_argument("--checkpoint-seconds", type=float, default=DEFAULT_CHECKPOINT_SECONDS, help=f"저널을 디스크에 반영하는 시간 간격(초) (기본: {DEFAULT_CHECKPOINT_SECONDS})")
+    parser.add_argument("--max-workers", type=int, default=DEFAULT_MAX_WORKERS, help=f"최대 동시 요청 수 (기본: {DEFAULT_MAX_WORKERS})")
+    parser.add_argument("--backend", choices=["openai", "hf"], default="openai", help="번역 백엔드: openai(OpenAI 호환 API, --base-url로 Ollama/vLLM 가능) 또는 hf(로컬 Hugging Face seq2seq 모델)")
+    parser.add_argument("--model", help=f"모델 이름 (기본: openai={MODEL}, hf={DEFAULT_HF_MODEL})")
+    parser.add_argument("--hf-device", default="cpu", help="hf 백엔드 실행 장치 (기본: cpu, 예: cuda)")
+    parser.add_argument("--hf-batch-size", type=int, default=DEFAULT_HF_BATCH_SIZE, help=f"hf 백엔드 생성 배치 크기 (기본: {DEFAULT_HF_BATCH_SIZE})")
+    parser.add_argument("--rpm", type=int, default=DEFAULT_RPM, help="분당 요청 한도 (기본: 0=제한 없음)")
+    parser.add_argument("--tpm", type=int, default=DEFAULT_TPM, help="분당 토큰 한도 (기본: 0=제한 없음)")
+    parser.add_argument("--pack-tokens", type=int, default=DEFAULT_PACK_TOKENS, help="여러 행을 예상 토큰 N개 이하로 묶어 한 요청으로 번역 (기본: 0=행마다 요청)")
+    parser.add_argument("--row-pack", action="store_true", help=f"한 행의 모든 컬럼이 짧으면(예상 {ROW_PACK_TOKENS}토큰 이하) 한 요청으로 번역")
+    parser.add_argument("--cache", default=str(DEFAULT_CACHE_PATH), help=f"번역 캐시 SQLite 경로 (기본: {DEFAULT_CACHE_PATH})")
+    parser.add_argument("--cache-size", type=int, default=DEFAULT_CACHE_SIZE, help=f"캐시 최대 항목 수 (기본: {DEFAULT_CACHE_SIZE:,})")
+    parser.add_argument("--no-cache", action="store_true", help="번역 캐시 사용 안 함")
+    parser.add_argument("--stream", action="store_true", help="입력을 청크 단위로 읽어 번역하고 출력에 이어쓰기 (CSV/Parquet, 대용량 파일용)")
+    parser.add_argument("--stream-chunk-size", type=int, default=DEFAULT_STREAM_CHUNK_SIZE, help=f"스트리밍 모드 읽기/쓰기 단위 행 수 (기본: {DEFAULT_STREAM_CHUNK_SIZE:,})")
+    parser.add_argument("--batch-api", action="store_true", help="Batch API로 오프라인 번역 (저렴하지만 최대 24시간 소요, 중단 후 재실행 시 제출한 배치에 다시 연결)")
+    parser.add_argument("--batch-poll-interval", type=float, default=DEFAULT_BATCH_POLL_SECONDS, help=f"Batch API 상태 확인 간격(초) (기본: {DEFAULT_BATCH_POLL_SECONDS})")
+    parser.add_argument("--base-url", help="OpenAI 호환 API 주소 (예: 로컬 목 서버 http://127.0.0.1:8000/v1)")
     
     args = parser.parse_args()
     
@@ -225,7 +1365,23 @@ def main():
         output_file=args.output,
         chunk_size=args.chunk_size,
         checkpoint_interval=args.checkpoint_interval,
-        max_workers=args.max_workers
+        checkpoint_seconds=args.checkpoint_seconds,
+        max_workers=args.max_workers,
+        base_url=args.base_url,
+        backend=args.backend,
+        model=args.model,
+        hf_device=args.hf_device,
+        hf_batch_size=args.hf_batch_size,
+        rpm=args.rpm,
+        tpm=args.tpm,
+        pack_tokens=args.pack_tokens,
+        row_pack=args.row_pack,
+        cache_path=None if args.no_cache else args.cache,
+        cache_size=args.cache_size,
+        stream=args.stream,
+        stream_chunk_size=args.stream_chunk_size,
+        batch_api=args.batch_api,
+        batch_poll_interval=args.batch_poll_interval
     )
 
 